@@ -2,6 +2,7 @@ import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.engine import URL
+from .replicas import ReplicaRouter, RoutedSession
 
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
@@ -9,26 +10,105 @@ DB_HOST = os.getenv("DB_HOST")
 DB_PORT = int(os.getenv("DB_PORT"))
 DB_NAME = os.getenv("DB_NAME")
 
-DATABASE_URL = URL.create(
-    drivername="mysql+pymysql",
-    username=DB_USER,
-    password=DB_PASSWORD,
-    host=DB_HOST,
-    port=DB_PORT,
-    database=DB_NAME,
-)
+def database_url(host, port, drivername="mysql+pymysql"):
+    return URL.create(
+        drivername=drivername,
+        username=DB_USER,
+        password=DB_PASSWORD,
+        host=host,
+        port=port,
+        database=DB_NAME,
+    )
 
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    future=True,
-    pool_size=20,
-    max_overflow=10,
-    pool_pre_ping=True,
-)
+DATABASE_URL = database_url(DB_HOST, DB_PORT)
+
+def pool_settings(prefix, size, overflow):
+    """Pool kwargs from <prefix>POOL_SIZE / MAX_OVERFLOW / POOL_TIMEOUT / POOL_RECYCLE env vars."""
+    return {
+        "pool_size": int(os.getenv(f"{prefix}POOL_SIZE", size)),
+        "max_overflow": int(os.getenv(f"{prefix}MAX_OVERFLOW", overflow)),
+        "pool_timeout": float(os.getenv(f"{prefix}POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv(f"{prefix}POOL_RECYCLE", 3600)),
+    }
+
+def make_engine(url, prefix, size, overflow):
+    return create_engine(
+        url,
+        echo=False,
+        future=True,
+        pool_pre_ping=True,
+        **pool_settings(prefix, size, overflow),
+    )
+
+def parse_hosts(value):
+    """[(host, port)] from "host[:port],host[:port]"; port defaults to DB_PORT."""
+    hosts = []
+    for item in (h.strip() for h in value.split(",")):
+        if item:
+            host, _, port = item.partition(":")
+            hosts.append((host, int(port) if port else DB_PORT))
+    return hosts
+
+# primary: all writes, and reads when no replica is up (DB_POOL_SIZE, DB_MAX_OVERFLOW, ...)
+engine = make_engine(DATABASE_URL, "DB_", 20, 10)
+
+# read replicas, same credentials / database as the primary (DB_REPLICA_POOL_SIZE, ... per replica)
+REPLICA_HOSTS = parse_hosts(os.getenv("DB_REPLICA_HOSTS", ""))
+replica_engines = [make_engine(database_url(h, p), "DB_REPLICA_", 20, 10) for h, p in REPLICA_HOSTS]
+replicas = ReplicaRouter(engine, replica_engines, float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30")))
+
+# index builds and exports get their own small pool so long scans can't take the
+# connections interactive requests need; on the first replica when there is one
+# (DB_BULK_HOST to pick another, DB_BULK_POOL_SIZE, ...)
+BULK_HOST = (parse_hosts(os.getenv("DB_BULK_HOST", "")) or REPLICA_HOSTS or [(DB_HOST, DB_PORT)])[0]
+bulk_engine = make_engine(database_url(*BULK_HOST), "DB_BULK_", 4, 2)
 
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine,
 )
+
+# read-only requests; the engine (healthy replica, else primary) is picked on first use
+ReadSessionLocal = sessionmaker(
+    class_=RoutedSession,
+    autocommit=False,
+    autoflush=False,
+    info={"router": replicas},
+)
+
+BulkSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=bulk_engine,
+)
+
+def all_engines():
+    """name -> engine for every sync pool, for pool stats."""
+    return {
+        "primary": engine,
+        "bulk": bulk_engine,
+        **{f"replica {h}:{p}": e for (h, p), e in zip(REPLICA_HOSTS, replica_engines)},
+    }
+
+# Async engine behind the /async routes, off unless DB_ASYNC=1.
+# DB_ASYNC_DRIVER picks the driver: aiomysql (default) or asyncmy.
+async_engine = None
+AsyncSessionLocal = None
+
+if os.getenv("DB_ASYNC") == "1":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        DATABASE_URL.set(drivername=f"mysql+{os.getenv('DB_ASYNC_DRIVER', 'aiomysql')}"),
+        echo=False,
+        pool_pre_ping=True,
+        **pool_settings("DB_ASYNC_", 20, 10),
+    )
+
+    # expire_on_commit=False: rows are serialized after the session's greenlet is gone
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
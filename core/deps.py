@@ -1,4 +1,4 @@
-from .db import SessionLocal
+from .db import AsyncSessionLocal, BulkSessionLocal, ReadSessionLocal, SessionLocal
 
 # keep this function isolated in its own file to prevent circular import errors
 def get_db():
@@ -7,3 +7,28 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    """
+    Session for read-only requests on a healthy replica (the primary when none is
+    configured or up). Nothing connects until the first query, which is also where
+    a dead replica fails over to the next one (core/replicas.py RoutedSession).
+    Reads can lag a just-made write.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_bulk_db():
+    # index builds / refreshes: the dedicated bulk pool
+    db = BulkSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
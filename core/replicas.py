@@ -0,0 +1,94 @@
+import itertools
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+# Routing for read-only sessions across read replicas, with failover.
+
+
+class ReplicaRouter:
+    """
+    Engines for read-only sessions: healthy replicas round robin, then the primary.
+    A replica is marked down for retry_after seconds when connecting to it fails
+    or one of its connections drops; after that it is tried again.
+    """
+
+    def __init__(self, primary, replicas, retry_after: float = 30.0):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.retry_after = retry_after
+        self.down_until = [0.0] * len(self.replicas)
+        self.failures = [0] * len(self.replicas)
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        for engine in self.replicas:
+            event.listen(engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        # connection is None when the error happened while connecting
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(context.engine)
+
+    def candidates(self):
+        """Engines to try for a read session, in order: up replicas (rotated), then the primary."""
+        now = time.monotonic()
+        n = len(self.replicas)
+        start = next(self.counter) % n if n else 0
+        up = [self.replicas[(start + k) % n] for k in range(n) if self.down_until[(start + k) % n] <= now]
+        return up + [self.primary]
+
+    def mark_down(self, engine):
+        with self.lock:
+            try:
+                i = self.replicas.index(engine)
+            except ValueError:
+                return
+            if self.down_until[i] > time.monotonic():
+                return
+            self.down_until[i] = time.monotonic() + self.retry_after
+            self.failures[i] += 1
+        print(f"replica {engine.url.host}:{engine.url.port} marked down for {self.retry_after:.0f}s")
+
+    def status(self):
+        now = time.monotonic()
+        return [
+            {
+                "host": e.url.host,
+                "port": e.url.port,
+                "up": self.down_until[i] <= now,
+                "failures": self.failures[i],
+                "pool": e.pool.status(),
+            }
+            for i, e in enumerate(self.replicas)
+        ]
+
+
+class RoutedSession(Session):
+    """
+    Read-only session that picks its engine from info["router"] (a ReplicaRouter)
+    on the first statement, not when it's created, so requests answered from
+    memory never check out a connection. A replica that fails to connect is
+    marked down and the next candidate tried; the primary's error is raised.
+    """
+
+    read_engine = None
+
+    def get_bind(self, mapper=None, **kw):
+        if self.read_engine is None:
+            self.read_engine = self._connect_read_engine()
+        return self.read_engine
+
+    def _connect_read_engine(self):
+        router = self.info["router"]
+        for engine in router.candidates():
+            try:
+                # explicit bind, so this doesn't come back through get_bind
+                self.connection(bind_arguments={"bind": engine})
+                return engine
+            except OperationalError:
+                self.close()
+                if engine is router.primary:
+                    raise
+                router.mark_down(engine)
@@ -7,7 +7,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from sqlalchemy import event
 
-from core.db import engine
+from core.db import all_engines, async_engine, engine, replicas
 from core.deps import get_db
 from models import Base
 
@@ -20,7 +20,8 @@ from routes.courses import router as courses_router
 from routes.course_sections import router as course_sections_router
 from routes.textbooks import router as textbooks_router
 from routes.library_yearly_data import router as library_yearly_data_router
-from routes.vector_search import router as vector_search_router
+from routes.vector_search import router as vector_search_router, warm_up as warm_up_vector_search
+from routes.autocomplete import router as autocomplete_router, warm_up as warm_up_autocomplete
 
 
 # Load env only for local dev
@@ -58,6 +59,12 @@ app.include_router(course_sections_router)
 app.include_router(textbooks_router)
 app.include_router(library_yearly_data_router)
 app.include_router(vector_search_router)
+app.include_router(autocomplete_router)
+
+# async twins of the read endpoints under /async (DB_ASYNC=1, needs aiomysql or asyncmy)
+if async_engine is not None:
+    from routes.async_routes import router as async_router
+    app.include_router(async_router)
 
 
 # ---------------- Health ----------------
@@ -67,16 +74,26 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/health/db")
+def health_db():
+    return {
+        "pools": {name: e.pool.status() for name, e in all_engines().items()},
+        "replicas": replicas.status(),
+    }
+
+
 # ---------------- Debug (optional) ----------------
 
 async def log_pool_stats():
     while True:
-        pool = engine.pool
-        print(
-            f"checked_out={pool.checkedout()} "
-            f"size={pool.size()} "
-            f"overflow={pool.overflow()}"
-        )
+        for name, e in all_engines().items():
+            pool = e.pool
+            print(
+                f"{name}: "
+                f"checked_out={pool.checkedout()} "
+                f"size={pool.size()} "
+                f"overflow={pool.overflow()}"
+            )
         await asyncio.sleep(10)
 
 
@@ -88,6 +105,23 @@ async def startup():
     if os.getenv("DEBUG_DB_POOL") == "1":
         asyncio.create_task(log_pool_stats())
 
+    # Load the embedding model + vector indexes before taking traffic.
+    # Off by default so CRUD-only / dev processes start instantly.
+    # Both warm-ups only front-load work done lazily on first use anyway, so a
+    # db / model error here is logged, not raised, and the app (and /health) still comes up.
+    if os.getenv("VECTOR_WARMUP") == "1":
+        try:
+            await asyncio.to_thread(warm_up_vector_search)
+        except Exception as e:
+            print(f"vector search warm-up failed, model and indexes will load on first use: {e}")
+
+    # Name indexes behind /autocomplete, also opt-in.
+    if os.getenv("AUTOCOMPLETE_WARMUP") == "1":
+        try:
+            await asyncio.to_thread(warm_up_autocomplete)
+        except Exception as e:
+            print(f"autocomplete warm-up failed, indexes will load on first use: {e}")
+
 
 # ---------------- SQLAlchemy events (optional) ----------------
 
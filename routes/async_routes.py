@@ -0,0 +1,70 @@
+import asyncio
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.db import BulkSessionLocal
+from core.deps import get_async_db
+from routes import (
+    college_yearly_data, colleges, course_sections, courses, departments,
+    library_yearly_data, professors, publications, textbooks, vector_search,
+)
+from routes.vector_search import SearchBody
+from utils.crud_factory import make_async_crud
+
+# Async (AsyncSession on aiomysql / asyncmy) versions of the read-heavy endpoints,
+# mounted under /async next to the threadpool ones (only when DB_ASYNC=1, see main.py).
+# Same queries and responses; a request waiting on MySQL holds no worker thread.
+# CPU-bound work (embedding, faiss, index builds) still goes to threads.
+# Writes stay on the sync routes, which keep the in-memory name indexes current.
+
+router = APIRouter(prefix="/async", tags=["async"])
+
+def add_crud_routes(module, key_type):
+    crud = make_async_crud(module.crud)
+    prefix = module.router.prefix
+    tags = [f"async {prefix.strip('/')}"]
+
+    async def get_all(
+        after_id: key_type | None = None,
+        limit: int | None = None,
+        fields: str | None = None,
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        return await crud.all(db, after_id, limit, fields)
+
+    async def get_one(item_id: key_type, db: AsyncSession = Depends(get_async_db)):
+        return await crud.get(db, item_id)
+
+    router.add_api_route(f"{prefix}/", get_all, methods=["GET"], tags=tags)
+    router.add_api_route(f"{prefix}/{{item_id}}", get_one, methods=["GET"], tags=tags)
+
+for module in (
+    colleges, college_yearly_data, departments, professors, publications,
+    courses, course_sections, library_yearly_data,
+):
+    add_crud_routes(module, int)
+add_crud_routes(textbooks, str)
+
+def with_session(fn):
+    # index load / build is blocking work, done in a thread with a bulk-pool session
+    with BulkSessionLocal() as db:
+        return fn(db)
+
+@router.post("/vector_search/search")
+async def search_vector(body: SearchBody, db: AsyncSession = Depends(get_async_db)):
+    await asyncio.to_thread(with_session, vector_search.ensure_index)
+    colleges_filter = await db.run_sync(vector_search.search_colleges_filter, body)
+    page, summary, next_cursor, total = await asyncio.to_thread(vector_search.section_page, body, colleges_filter)
+    hydrated = await db.run_sync(vector_search.hydrate_hits, [i for i, _ in page])
+    return vector_search.section_response(body, page, summary, next_cursor, total, hydrated)
+
+@router.post("/vector_search/professors")
+async def search_professors(body: SearchBody, db: AsyncSession = Depends(get_async_db)):
+    await asyncio.to_thread(with_session, vector_search.ensure_prof_index)
+
+    if vector_search.prof_index is None:
+        return vector_search.prof_response(body, [], {}, None, 0)
+
+    colleges_filter = await db.run_sync(vector_search.search_colleges_filter, body)
+    hits, next_cursor, total = await asyncio.to_thread(vector_search.prof_page, body, colleges_filter)
+    depts = await db.run_sync(vector_search.load_departments, hits)
+    return vector_search.prof_response(body, hits, depts, next_cursor, total)
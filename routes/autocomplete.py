@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from routes.colleges import college_names
+from routes.courses import course_names
+from routes.departments import department_names
+from routes.professors import professor_names
+from routes.textbooks import textbook_titles
+
+router = APIRouter(prefix="/autocomplete", tags=["autocomplete"])
+
+from core.deps import get_read_db
+
+# suggestion sources, each an in-memory name index owned (and kept current) by its router
+SOURCES = {
+    "colleges": college_names,
+    "departments": department_names,
+    "professors": professor_names,
+    "courses": course_names,
+    "textbooks": textbook_titles,
+}
+MAX_SUGGESTIONS = 50
+
+def warm_up():
+    """Build every suggestion index so the first keystrokes don't pay for it."""
+    from core.db import BulkSessionLocal
+    with BulkSessionLocal() as db:
+        for source in SOURCES.values():
+            source.get(db)
+
+@router.get("/")
+def autocomplete(q: str, types: str | None = None, limit: int = 8, db: Session = Depends(get_read_db)):
+    """
+    Ranked {type, id, label} suggestions for a partial query across entity types
+    (?types=colleges,professors to narrow). Answered from memory; the db session
+    is only used if an index has to be (re)loaded.
+    """
+    names = [t.strip() for t in types.split(",") if t.strip()] if types else list(SOURCES)
+    unknown = [t for t in names if t not in SOURCES]
+    if unknown:
+        raise HTTPException(400, f"unknown types: {', '.join(unknown)} (expected {', '.join(SOURCES)})")
+    limit = max(1, min(limit, MAX_SUGGESTIONS))
+
+    hits = []
+    for t in names:
+        hits += [(score, t, id_, label) for id_, label, score in SOURCES[t].get(db).complete(q, limit)]
+    hits.sort(key=lambda h: -h[0])
+    return [{"type": t, "id": id_, "label": label} for _, t, id_, label in hits[:limit]]
+
+@router.get("/stats")
+def stats():
+    out = {}
+    for t, source in SOURCES.items():
+        index = source.current()
+        out[t] = {**source.stats(), **(index.stats() if index is not None else {})}
+    return out
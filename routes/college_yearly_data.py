@@ -7,14 +7,23 @@ router = APIRouter(prefix="/college_yearly_data", tags=["college_yearly_data"])
 
 crud = make_crud(CollegeYearlyData)
 
-from core.deps import get_db
+from core.deps import get_db, get_read_db
 
 @router.get("/")
-def get_all(db: Session = Depends(get_db)):
-    return crud.all(db)
+def get_all(
+    after_id: int | None = None,
+    limit: int | None = None,
+    fields: str | None = None,
+    db: Session = Depends(get_read_db)
+):
+    # keyset pagination: pass the last row's id as after_id for the next page
+    return crud.all(db, after_id, limit, fields)
+
+crud.add_export_route(router)
+crud.add_bulk_route(router)
 
 @router.get("/{item_id}")
-def get_one(item_id: int, db: Session = Depends(get_db)):
+def get_one(item_id: int, db: Session = Depends(get_read_db)):
     return crud.get(db, item_id)
 
 @router.post("/")
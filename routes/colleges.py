@@ -1,13 +1,53 @@
-from fastapi import APIRouter, Depends
+import os
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from models import College
-from utils.crud_factory import make_crud
+from utils.cached_index import CachedIndex
+from utils.crud_factory import MAX_LIMIT, make_crud, page_limit
+from utils.geo import UNITS
+from utils.geo_index import GeoIndex
+from utils.name_index import LiveNameIndex, NameIndex
 
 router = APIRouter(prefix="/colleges", tags=["colleges"])
 
 crud = make_crud(College)
 
-from core.deps import get_db
+from core.deps import get_db, get_read_db
+
+# in-memory indexes over the colleges table, loaded on first use and dropped on
+# writes through this router; the TTL picks up writes made by other workers
+INDEX_TTL = float(os.getenv("COLLEGE_INDEX_TTL_SECONDS", "300"))
+
+# coordinates for radius / nearest queries
+college_geo = CachedIndex(
+    lambda db: GeoIndex.from_rows(db.query(College.college_id, College.latitude, College.longitude).all()),
+    INDEX_TTL,
+)
+# names (+ abbreviation, so "UTSA" finds it) for ?search=, /search and /autocomplete
+def college_name(c):
+    return c.college_id, c.name, f"{c.name} {c.abbreviation or ''}"
+
+college_names = CachedIndex(
+    lambda db: LiveNameIndex(NameIndex.from_rows(
+        college_name(c) for c in db.query(College.college_id, College.name, College.abbreviation)
+    )),
+    INDEX_TTL,
+    college_name,
+)
+
+def invalidate_indexes():
+    college_geo.invalidate()
+    college_names.invalidate()
+
+def index_write(college=None, removed_id=None):
+    # names are patched in place, coordinates reload on next use
+    college_geo.invalidate()
+    college_names.write(college, removed_id)
+
+def check_point(lat: float, lng: float):
+    if not -90 <= lat <= 90 or not -180 <= lng <= 180:
+        raise HTTPException(400, "lat must be in [-90, 90] and lng in [-180, 180]")
 
 @router.get("/")
 def get_colleges(
@@ -18,45 +58,96 @@ def get_colleges(
     lat: float | None = None,
     lng: float | None = None,
     radius: float | None = None,
-    db: Session = Depends(get_db)
+    unit: Literal["km", "mi"] = "km",
+    after_id: int | None = None,
+    fields: str | None = None,
+    db: Session = Depends(get_read_db)
 ):
     query = db.query(College)
 
-    if search:
-        query = query.filter(College.name.ilike(f"%{search}%"))
-
     if state:
         query = query.filter(College.state == state)
 
     if city:
         query = query.filter(College.city == city)
 
-    if lat and lng and radius:
-        query = query.filter(
-            func.sqrt(
-                (College.latitude - lat) * (College.latitude - lat) +
-                (College.longitude - lng) * (College.longitude - lng)
-            ) <= radius
-        )
+    if lat is not None and lng is not None and radius is not None:
+        # radius in km / miles, matched against the in-memory index, not per-row SQL math
+        check_point(lat, lng)
+        ids, _ = college_geo.get(db).within(lat, lng, radius * UNITS[unit])
+        query = query.filter(College.college_id.in_(ids.tolist()))
 
-    if limit:
-        query = query.limit(limit)
+    if search:
+        # name / abbreviation matches from the in-memory index instead of a leading-wildcard ILIKE,
+        # returned best match first like /search; after_id continues the ranked list past that id
+        ranked = [i for i, _, _ in college_names.get(db).search(search, MAX_LIMIT)]
+        if ranked and query.whereclause is not None:
+            allowed = {i for (i,) in query.with_entities(College.college_id).filter(College.college_id.in_(ranked))}
+            ranked = [i for i in ranked if i in allowed]
+        if after_id is not None:
+            ranked = ranked[ranked.index(after_id) + 1:] if after_id in ranked else []
+        return crud.by_ids(db, ranked[:page_limit(limit)], fields)
+
+    return crud.all(db, after_id, limit, fields, query=query)
+
+crud.add_export_route(router)
+crud.add_bulk_route(router, after_bulk=invalidate_indexes)
+
+@router.get("/search")
+def search_colleges(q: str, limit: int = 10, fields: str | None = None, db: Session = Depends(get_read_db)):
+    """Colleges whose name or abbreviation matches q (prefix, infix or fuzzy), best match first."""
+    hits = college_names.get(db).search(q, max(1, min(limit, MAX_LIMIT)))
+    return crud.by_ids(db, [i for i, _, _ in hits], fields)
+
+@router.get("/nearby")
+def nearby(
+    lat: float,
+    lng: float,
+    radius: float | None = None,
+    n: int = 10,
+    unit: Literal["km", "mi"] = "km",
+    fields: str | None = None,
+    db: Session = Depends(get_read_db)
+):
+    """Up to n colleges nearest (lat, lng), optionally within radius, sorted by distance (in unit)."""
+    check_point(lat, lng)
+    n = max(1, min(n, 1000))
+    geo = college_geo.get(db)
+    if radius is None:
+        ids, dist = geo.nearest(lat, lng, n)
+    else:
+        ids, dist = geo.within(lat, lng, radius * UNITS[unit], limit=n)
+    if not len(ids):
+        return []
 
-    return query.all()
+    cols = crud.columns(fields) or [getattr(College, c.key) for c in College.__table__.c]
+    rows = {r.college_id: r for r in db.query(*cols).filter(College.college_id.in_(ids.tolist())).all()}
+    out = []
+    for college_id, d in zip(ids.tolist(), dist.tolist()):
+        row = rows.get(college_id)
+        if row is not None:
+            out.append({**row._mapping, "distance": round(d / UNITS[unit], 3), "unit": unit})
+    return out
 
 @router.get("/{item_id}")
-def get_one(item_id: int, db: Session = Depends(get_db)):
+def get_one(item_id: int, db: Session = Depends(get_read_db)):
     return crud.get(db, item_id)
 
 @router.post("/")
 def create(data: dict, db: Session = Depends(get_db)):
-    return crud.create(db, data)
+    college = crud.create(db, data)
+    index_write(college)
+    return college
 
 @router.put("/{item_id}")
 def update(item_id: int, data: dict, db: Session = Depends(get_db)):
-    return crud.update(db, item_id, data)
+    college = crud.update(db, item_id, data)
+    index_write(college)
+    return college
 
 @router.delete("/{item_id}")
 def delete(item_id: int, db: Session = Depends(get_db)):
-    return crud.delete(db, item_id)
+    result = crud.delete(db, item_id)
+    index_write(removed_id=item_id)
+    return result
 
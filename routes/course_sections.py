@@ -7,17 +7,24 @@ router = APIRouter(prefix="/course_sections", tags=["course_sections"])
 
 crud = make_crud(CourseSection)
 
-from core.deps import get_db
+from core.deps import get_db, get_read_db
 
 @router.get("/")
-def get_all(limit: int | None = None, offset: int = 0, db: Session = Depends(get_db)):
-    q = db.query(CourseSection)
-    if limit is not None:
-        q = q.limit(limit).offset(offset)
-    return q.all()
+def get_all(
+    after_id: int | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    fields: str | None = None,
+    db: Session = Depends(get_read_db)
+):
+    # keyset pagination: pass the last row's section_id as after_id for the next page
+    return crud.all(db, after_id, limit, fields, offset=offset)
+
+crud.add_export_route(router)
+crud.add_bulk_route(router)
 
 @router.get("/{item_id}")
-def get_one(item_id: int, db: Session = Depends(get_db)):
+def get_one(item_id: int, db: Session = Depends(get_read_db)):
     return crud.get(db, item_id)
 
 @router.post("/")
@@ -1,30 +1,60 @@
+import os
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from models import Course
+from utils.cached_index import CachedIndex
 from utils.crud_factory import make_crud
+from utils.name_index import LiveNameIndex, NameIndex
 
 router = APIRouter(prefix="/courses", tags=["courses"])
 
 crud = make_crud(Course)
 
-from core.deps import get_db
+from core.deps import get_db, get_read_db
+
+# course code + title for /autocomplete, see utils/cached_index.py
+def course_name(c):
+    return c.course_id, " ".join(t for t in (c.course_code, c.course_title) if t)
+
+course_names = CachedIndex(
+    lambda db: LiveNameIndex(NameIndex.from_rows(
+        course_name(c) for c in db.query(Course.course_id, Course.course_code, Course.course_title)
+    )),
+    float(os.getenv("COURSE_INDEX_TTL_SECONDS", "300")),
+    course_name,
+)
 
 @router.get("/")
-def get_all(db: Session = Depends(get_db)):
-    return crud.all(db)
+def get_all(
+    after_id: int | None = None,
+    limit: int | None = None,
+    fields: str | None = None,
+    db: Session = Depends(get_read_db)
+):
+    # keyset pagination: pass the last row's course_id as after_id for the next page
+    return crud.all(db, after_id, limit, fields)
+
+crud.add_export_route(router)
+crud.add_bulk_route(router, after_bulk=course_names.invalidate)
 
 @router.get("/{item_id}")
-def get_one(item_id: int, db: Session = Depends(get_db)):
+def get_one(item_id: int, db: Session = Depends(get_read_db)):
     return crud.get(db, item_id)
 
 @router.post("/")
 def create(data: dict, db: Session = Depends(get_db)):
-    return crud.create(db, data)
+    course = crud.create(db, data)
+    course_names.write(course)
+    return course
 
 @router.put("/{item_id}")
 def update(item_id: int, data: dict, db: Session = Depends(get_db)):
-    return crud.update(db, item_id, data)
+    course = crud.update(db, item_id, data)
+    course_names.write(course)
+    return course
 
 @router.delete("/{item_id}")
 def delete(item_id: int, db: Session = Depends(get_db)):
-    return crud.delete(db, item_id)
+    result = crud.delete(db, item_id)
+    course_names.write(removed_id=item_id)
+    return result
@@ -1,30 +1,60 @@
+import os
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from models import Department
+from utils.cached_index import CachedIndex
 from utils.crud_factory import make_crud
+from utils.name_index import LiveNameIndex, NameIndex
 
 router = APIRouter(prefix="/departments", tags=["departments"])
 
 crud = make_crud(Department)
 
-from core.deps import get_db
+from core.deps import get_db, get_read_db
+
+# department names (+ code) for /autocomplete, see utils/cached_index.py
+def department_name(d):
+    return d.department_id, d.name, f"{d.name} {d.code or ''}"
+
+department_names = CachedIndex(
+    lambda db: LiveNameIndex(NameIndex.from_rows(
+        department_name(d) for d in db.query(Department.department_id, Department.name, Department.code)
+    )),
+    float(os.getenv("DEPARTMENT_INDEX_TTL_SECONDS", "300")),
+    department_name,
+)
 
 @router.get("/")
-def get_all(db: Session = Depends(get_db)):
-    return crud.all(db)
+def get_all(
+    after_id: int | None = None,
+    limit: int | None = None,
+    fields: str | None = None,
+    db: Session = Depends(get_read_db)
+):
+    # keyset pagination: pass the last row's department_id as after_id for the next page
+    return crud.all(db, after_id, limit, fields)
+
+crud.add_export_route(router)
+crud.add_bulk_route(router, after_bulk=department_names.invalidate)
 
 @router.get("/{item_id}")
-def get_one(item_id: int, db: Session = Depends(get_db)):
+def get_one(item_id: int, db: Session = Depends(get_read_db)):
     return crud.get(db, item_id)
 
 @router.post("/")
 def create(data: dict, db: Session = Depends(get_db)):
-    return crud.create(db, data)
+    department = crud.create(db, data)
+    department_names.write(department)
+    return department
 
 @router.put("/{item_id}")
 def update(item_id: int, data: dict, db: Session = Depends(get_db)):
-    return crud.update(db, item_id, data)
+    department = crud.update(db, item_id, data)
+    department_names.write(department)
+    return department
 
 @router.delete("/{item_id}")
 def delete(item_id: int, db: Session = Depends(get_db)):
-    return crud.delete(db, item_id)
+    result = crud.delete(db, item_id)
+    department_names.write(removed_id=item_id)
+    return result
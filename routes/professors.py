@@ -1,52 +1,82 @@
+import os
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from models import Professor, College
-from utils.crud_factory import make_crud
-from sqlalchemy import or_
+from models import Professor
+from routes.colleges import college_names
+from utils.cached_index import CachedIndex
+from utils.crud_factory import MAX_LIMIT, make_crud
+from utils.name_index import LiveNameIndex, NameIndex
 
 router = APIRouter(prefix="/professors", tags=["professors"])
 
 crud = make_crud(Professor)
 
-from core.deps import get_db
+from core.deps import get_db, get_read_db
+
+# professor names for /search and /autocomplete, see utils/cached_index.py
+professor_names = CachedIndex(
+    lambda db: LiveNameIndex(NameIndex.from_rows(db.query(Professor.professor_id, Professor.name))),
+    float(os.getenv("PROFESSOR_INDEX_TTL_SECONDS", "300")),
+    lambda p: (p.professor_id, p.name),
+)
 
 @router.get("/")
-def get_all(db: Session = Depends(get_db)):
-    return crud.all(db)
+def get_all(
+    after_id: int | None = None,
+    limit: int | None = None,
+    fields: str | None = None,
+    db: Session = Depends(get_read_db)
+):
+    # keyset pagination: pass the last row's professor_id as after_id for the next page
+    return crud.all(db, after_id, limit, fields)
 
-@router.get("/search")
-def search_professors(school: str = None, name: str = None, db: Session = Depends(get_db)):
-    query = db.query(Professor)
+crud.add_export_route(router)
+crud.add_bulk_route(router, after_bulk=professor_names.invalidate)
 
+@router.get("/search")
+def search_professors(
+    school: str = None,
+    name: str = None,
+    limit: int = 20,
+    fields: str | None = None,
+    db: Session = Depends(get_read_db)
+):
+    """Professors by name (ranked, prefix / fuzzy), optionally only at a school (college id or name)."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    query = None
     if school:
         if school.isdigit():
-            query = query.filter(Professor.college_id == int(school))
+            college_ids = [int(school)]
         else:
-            query = query.join(College).filter(College.name.ilike(f"%{school}%"))
+            college_ids = [i for i, _, _ in college_names.get(db).search(school, MAX_LIMIT)]
+        query = db.query(Professor).filter(Professor.college_id.in_(college_ids))
 
-    if name:
-        clean = name.strip()
-        query = query.filter(
-            or_(
-                Professor.first_name.ilike(f"%{clean}%"),
-                Professor.last_name.ilike(f"%{clean}%")
-            )
-        )
+    if not name:
+        return crud.all(db, limit=limit, fields=fields, query=query)
 
-    return query.all()
+    # restrict the name ranking to the school's professors (college_id is indexed)
+    allowed = [r[0] for r in query.with_entities(Professor.professor_id)] if query is not None else None
+    hits = professor_names.get(db).search(name, limit, ids=allowed)
+    return crud.by_ids(db, [i for i, _, _ in hits], fields)
 
 @router.get("/{item_id}")
-def get_one(item_id: int, db: Session = Depends(get_db)):
+def get_one(item_id: int, db: Session = Depends(get_read_db)):
     return crud.get(db, item_id)
 
 @router.post("/")
 def create(data: dict, db: Session = Depends(get_db)):
-    return crud.create(db, data)
+    professor = crud.create(db, data)
+    professor_names.write(professor)
+    return professor
 
 @router.put("/{item_id}")
 def update(item_id: int, data: dict, db: Session = Depends(get_db)):
-    return crud.update(db, item_id, data)
+    professor = crud.update(db, item_id, data)
+    professor_names.write(professor)
+    return professor
 
 @router.delete("/{item_id}")
 def delete(item_id: int, db: Session = Depends(get_db)):
-    return crud.delete(db, item_id)
+    result = crud.delete(db, item_id)
+    professor_names.write(removed_id=item_id)
+    return result
@@ -1,35 +1,79 @@
+import os
 from fastapi import APIRouter, Depends
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from models import Textbook
-from utils.crud_factory import make_crud
+from utils.cached_index import CachedIndex
+from utils.crud_factory import MAX_LIMIT, make_crud
+from utils.name_index import LiveNameIndex, NameIndex
 
 router = APIRouter(prefix="/textbooks", tags=["textbooks"])
 
 crud = make_crud(Textbook)
 
-from core.deps import get_db
+from core.deps import get_db, get_read_db
+
+# textbook titles for /search and /autocomplete, see utils/cached_index.py
+textbook_titles = CachedIndex(
+    lambda db: LiveNameIndex(NameIndex.from_rows(db.query(Textbook.isbn_13, Textbook.title))),
+    float(os.getenv("TEXTBOOK_INDEX_TTL_SECONDS", "300")),
+    lambda t: (t.isbn_13, t.title),
+)
 
 @router.get("/")
-def get_all(db: Session = Depends(get_db)):
-    return crud.all(db)
+def get_all(
+    after_id: str | None = None,
+    limit: int | None = None,
+    fields: str | None = None,
+    db: Session = Depends(get_read_db)
+):
+    # keyset pagination: pass the last row's isbn_13 as after_id for the next page
+    return crud.all(db, after_id, limit, fields)
+
+crud.add_export_route(router)
+crud.add_bulk_route(router, after_bulk=textbook_titles.invalidate)
+
+@router.get("/search")
+def search_textbooks(q: str, limit: int = 20, fields: str | None = None, db: Session = Depends(get_read_db)):
+    """Textbooks whose title matches q (prefix, infix or fuzzy), best match first."""
+    hits = textbook_titles.get(db).search(q, max(1, min(limit, MAX_LIMIT)))
+    return crud.by_ids(db, [i for i, _, _ in hits], fields)
 
 @router.get("/{item_id}")
-def get_one(item_id: int, db: Session = Depends(get_db)):
+def get_one(item_id: int, db: Session = Depends(get_read_db)):
     return crud.get(db, item_id)
 
 @router.get("/isbn/{isbn13}")
-def search_by_isbn(isbn13: str, db: Session = Depends(get_db)):
-    clean = "".join(c for c in isbn13 if c.isdigit())
-    return db.query(Textbook).filter(Textbook.isbn_13.like(f"%{clean}%")).all()
+def search_by_isbn(isbn13: str, limit: int = 20, db: Session = Depends(get_read_db)):
+    # full ISBN-13 / ISBN-10 is an exact match, anything shorter a prefix;
+    # both can use the index, unlike the old '%x%'
+    clean = "".join(c for c in isbn13 if c.isdigit() or c in "xX").upper()
+    if not clean:
+        return []
+    query = db.query(Textbook)
+    if len(clean) == 13:
+        query = query.filter(Textbook.isbn_13 == clean)
+    elif len(clean) == 10:
+        query = query.filter(or_(Textbook.isbn_10 == clean, Textbook.isbn_13.like(f"{clean}%")))
+    else:
+        query = query.filter(Textbook.isbn_13.like(f"{clean}%"))
+    return query.order_by(Textbook.isbn_13).limit(max(1, min(limit, MAX_LIMIT))).all()
 
 @router.post("/")
 def create(data: dict, db: Session = Depends(get_db)):
-    return crud.create(db, data)
+    textbook = crud.create(db, data)
+    textbook_titles.write(textbook)
+    return textbook
 
 @router.put("/{item_id}")
 def update(item_id: int, data: dict, db: Session = Depends(get_db)):
-    return crud.update(db, item_id, data)
+    textbook = crud.update(db, item_id, data)
+    textbook_titles.write(textbook)
+    return textbook
 
 @router.delete("/{item_id}")
 def delete(item_id: int, db: Session = Depends(get_db)):
-    return crud.delete(db, item_id)
+    result = crud.delete(db, item_id)
+    # isbn_13 is the key; the path param comes in as an int
+    textbook_titles.write(removed_id=str(item_id))
+    return result
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session, joinedload
+from pydantic import BaseModel, Field
+from typing import Literal
 from models import (
         CourseSection, 
         College, 
@@ -10,264 +11,806 @@ from models import (
         Professor,
         course_textbooks
     )
-import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import os
-from core.deps import get_db
-
-# TODO: dynamically trigger regeneration of cached files once db is updated with new data.
-# This may be done daily or something later on due to relatively infrequent data loading
+import threading
+from datetime import datetime
+from core.db import BulkSessionLocal
+from core.deps import get_bulk_db, get_read_db
+from utils import ann_index, artifacts, geo
+from utils.query_cache import QueryEmbeddingCache
+from utils.embed_batcher import EmbedBatcher
+from utils.paging import iter_keyset, prefetch
+from utils.parallel_encode import ParallelEncoder
+from utils.embedding_backend import LazyBackend
+from utils.columnar import ColumnStore, ColumnWriter, merge_stores
+from utils.lexical_index import LexicalBuilder, LexicalIndex, rrf
+from utils.result_summary import SummaryBuilder, SummaryIndex
+from utils.result_cursors import ResultCursors, decode_cursor, encode_cursor
+
+# Index lifecycle:
+#   scripts/build_index.py builds / syncs both indexes offline and publishes a new artifact version
+#   ensure_* loads the live version (or builds on first request) and hot-reloads newer versions
+#   POST /vector_search/refresh re-embeds only rows changed since the last build (run it after data loads)
 
 router = APIRouter(prefix="/vector_search", tags=["vector_search"])
 
 class SearchBody(BaseModel):
     q: str
-    k: int = 5 
-    s: float = 0.35
-
-model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-
-INDEX_PATH = "./.cache/vector_cache.faiss"
-META_PATH = "./.cache/vector_cache_ids.npy"
+    k: int = Field(5, gt=0)
+    s: float = 0.35  # min cosine similarity for vector hits
+    # vector: embeddings only; lexical: BM25 only; hybrid: both fused with reciprocal rank fusion
+    mode: Literal["vector", "lexical", "hybrid"] = "vector"
+    nprobe: int | None = None     # ivf indexes only, defaults to VECTOR_IVF_NPROBE
+    ef_search: int | None = None  # hnsw only, defaults to VECTOR_HNSW_EF_SEARCH
+    # filters, applied inside the ann search (see filter_ids)
+    college_id: int | None = None
+    state: str | None = None
+    department_id: int | None = None
+    semester: str | None = None   # sections only
+    term_year: int | None = None  # sections only
+    lat: float | None = None
+    lng: float | None = None
+    radius_km: float | None = None  # colleges within radius_km of lat / lng
+    # pagination: with page_size the first call ranks k hits and returns next_cursor;
+    # pass it back (with the same page_size) to get the next page without re-ranking
+    page_size: int | None = Field(None, gt=0)
+    cursor: str | None = None
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# torch | torch_int8 | onnx | onnx_int8, see utils/embedding_backend.py
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+# nothing heavy is loaded at import; the model comes up on first encode or in warm_up()
+embedder = LazyBackend(EMBED_BACKEND, MODEL_NAME)
+
+# query text -> embedding, QUERY_CACHE_DISK=1 adds a mmap tier shared by all workers
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "10000"))
+QUERY_CACHE_DISK_SLOTS = int(os.getenv("QUERY_CACHE_DISK_SLOTS", "65536"))
+
+# coalesce concurrent query encodes into one model.encode call, see utils/embed_batcher.py
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "1") == "1"
+
+def encode_texts(texts):
+    return embedder.encode(texts)
+
+def query_cache_path():
+    if os.getenv("QUERY_CACHE_DISK") != "1":
+        return None
+    os.makedirs("./.cache", exist_ok=True)
+    slug = MODEL_NAME.replace("/", "__")
+    return f"./.cache/query_emb_{slug}_{EMBED_BACKEND}_{embedder.dim}_{QUERY_CACHE_DISK_SLOTS}.mmap"
+
+embed_batcher = None
+query_cache = None
+provider_lock = threading.Lock()
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """Query embedding path (cache -> batcher -> model), created on first use."""
+    global embed_batcher, query_cache
+    if query_cache is None:
+        with provider_lock:
+            if query_cache is None:
+                if EMBED_BATCHING:
+                    embed_batcher = EmbedBatcher(
+                        encode_texts,
+                        max_batch=int(os.getenv("EMBED_BATCH_MAX", "32")),
+                        max_wait_ms=float(os.getenv("EMBED_BATCH_WAIT_MS", "3")),
+                    )
+                query_cache = QueryEmbeddingCache(
+                    f"{MODEL_NAME}:{EMBED_BACKEND}",
+                    embed_batcher.encode if embed_batcher else encode_texts,
+                    embedder.dim,
+                    max_items=QUERY_CACHE_SIZE,
+                    disk_path=query_cache_path(),
+                    disk_slots=QUERY_CACHE_DISK_SLOTS,
+                )
+    return query_cache
+
+# artifact file names inside the live version directory, see utils/artifacts.py
+INDEX_FILE = "vector_cache.faiss"
+# section metadata per faiss label, memory-mapped by every worker (utils/columnar.py)
+SECTION_META_FILE = "sections.col"
+# BM25 index over the same labels, see utils/lexical_index.py
+SECTION_LEX_FILE = "sections.lex"
+# college / department / textbooks per course, the joined part of a section hit;
+# memory-mapped like SECTION_META_FILE instead of copied into every worker's heap
+SECTION_COURSE_FILE = "section_courses.col"
+COURSE_JOIN_SCHEMA = {
+    "college": "json",
+    "department": "json",
+    "textbooks": "json",
+}
+# college / publisher summary arrays over the indexed sections, see utils/result_summary.py
+SECTION_SUMMARY_FILE = "sections.summary"
+SECTION_META_SCHEMA = {
+    "course_id": "int",
+    "section_code": "str",
+    "description": "str",
+    # filter columns, see filter_ids
+    "college_id": "int",
+    "department_id": "int",
+    "semester": "cat",
+    "term_year": "int",
+}
+
+# minimum rows fetched + encoded + added per step of an index build, see build_chunk
+INDEX_BUILD_CHUNK = int(os.getenv("INDEX_BUILD_CHUNK", "2048"))
+# >1 encodes each build step on a process pool, INDEX_ENCODE_CHUNK texts per task
+INDEX_ENCODE_WORKERS = int(os.getenv("INDEX_ENCODE_WORKERS", "1"))
+INDEX_ENCODE_CHUNK = int(os.getenv("INDEX_ENCODE_CHUNK", "256"))
+
+def build_encoder(workers: int | None = None):
+    return ParallelEncoder(embedder.get(), workers or INDEX_ENCODE_WORKERS, INDEX_ENCODE_CHUNK)
+
+def build_chunk(encoder: ParallelEncoder) -> int:
+    """Rows per build step: at least two encode tasks per pool worker, so none sits idle."""
+    return max(INDEX_BUILD_CHUNK, 2 * encoder.workers * encoder.chunk_size)
+
+def index_batches(pages, id_field: str, text, lexical_text, record, only=None, watermark=None):
+    """
+    Plain-data pages for an index build / sync: (ids, texts, lexical texts,
+    records, watermark so far) per page of ORM rows, skipping rows without text
+    and, with only, ids outside it. Meant to run under prefetch, so the next page
+    is fetched and unpacked while this one encodes.
+    """
+    for rows in pages:
+        ids, texts, lex_texts, records = [], [], [], []
+        for r in rows:
+            row_id = getattr(r, id_field)
+            if only is not None and row_id not in only:
+                continue
+            body = text(r)
+            if not body:
+                continue
+            ids.append(row_id)
+            texts.append(body)
+            lex_texts.append(lexical_text(r))
+            records.append(record(r))
+        watermark = max_updated_at(rows, watermark)
+        yield ids, texts, lex_texts, records, watermark
+
+# index type / build params, see utils/ann_index.py
+INDEX_CONFIG = ann_index.index_config("SECTION")
+
+# candidates taken from each ranking before fusing in hybrid mode
+HYBRID_DEPTH = int(os.getenv("VECTOR_HYBRID_DEPTH", "100"))
+
+# ranked hit lists kept for cursor pagination, per worker
+result_cursors = ResultCursors(
+    max_items=int(os.getenv("VECTOR_CURSOR_CACHE_SIZE", "1000")),
+    ttl=float(os.getenv("VECTOR_CURSOR_TTL_SECONDS", "300")),
+)
+
+# set VECTOR_BUILD_ON_REQUEST=0 when artifacts come from scripts/build_index.py;
+# requests then get a 503 instead of blocking on a full encode
+BUILD_ON_REQUEST = os.getenv("VECTOR_BUILD_ON_REQUEST", "1") == "1"
+# how often a worker checks for a newly published artifact version
+RELOAD_CHECK_SECONDS = float(os.getenv("VECTOR_RELOAD_CHECK_SECONDS", "5"))
 
 index = None
-sections_cache = []
+index_meta = None
+index_path = None  # file a loaded (possibly memory-mapped) index was read from, None once modified in memory
+index_file_id = None  # artifacts.file_id of the loaded .faiss, changes when a new build is published
+sections_cache = ColumnStore.from_records([], "section_id", SECTION_META_SCHEMA)  # section_id -> section dict
+section_courses = ColumnStore.from_records([], "course_id", COURSE_JOIN_SCHEMA)  # course_id -> joined records
+section_lexical = None
+section_summary = SummaryBuilder().finish([], [])  # integer-coded summary contributions, see build_course_joins
 built = False
 
-def save_cache():
-    faiss.write_index(index, INDEX_PATH)
-    ids = np.array([s["section_id"] for s in sections_cache], dtype=np.int32)
-    np.save(META_PATH, ids)
+load_lock = threading.Lock()
+sync_lock = threading.Lock()
+
+def save_cache(stage: artifacts.Stage | None = None):
+    global index_file_id
+    if stage is None:
+        with artifacts.publish() as stage:
+            save_cache(stage)
+        index_file_id = artifacts.file_id(INDEX_FILE)
+        return
+    ann_index.write_index(index, index_meta, stage.path(INDEX_FILE))
+    sections_cache.write(stage.path(SECTION_META_FILE))
+    section_courses.write(stage.path(SECTION_COURSE_FILE))
+    section_summary.write(stage.path(SECTION_SUMMARY_FILE))
+    section_lexical.write(stage.path(SECTION_LEX_FILE))
+
+def section_store(records):
+    return ColumnStore.from_records(records, "section_id", SECTION_META_SCHEMA)
+
+def course_store(records):
+    return ColumnStore.from_records(records, "course_id", COURSE_JOIN_SCHEMA)
+
+def section_course_ids(store: ColumnStore):
+    """course_id per row of a section metadata store, -1 where it's null."""
+    values, nulls = store.column("course_id")
+    return np.where(nulls == 0, values, -1)
+
+def section_query(db: Session):
+    # section_record / section_lexical_text read course, department and professor; load them with the section instead of one query each
+    return db.query(CourseSection).options(
+        joinedload(CourseSection.course).joinedload(Course.department),
+        joinedload(CourseSection.professor),
+    )
+
+def section_record(s: CourseSection):
+    department = s.course.department if s.course else None
+    return {
+        "section_id": s.section_id,
+        "course_id": s.course_id,
+        "section_code": s.section_code,
+        "description": s.description,
+        "college_id": department.college_id if department else None,
+        "department_id": department.department_id if department else None,
+        "semester": s.semester,
+        "term_year": s.term_year,
+    }
+
+def section_text(s: CourseSection):
+    desc = (s.description or "").strip()
+    lo = (s.learning_objectives or "").strip()
+    if not desc:
+        return None
+    return f"{desc} {lo}".strip()
+
+def section_lexical_text(s: CourseSection):
+    course_code = s.course_code or (s.course.course_code if s.course else None)
+    professor = s.professor.name if s.professor else None
+    return " ".join(t for t in (course_code, s.section_code, professor, s.description) if t)
+
+def max_updated_at(rows, current=None):
+    stamps = [r.updated_at for r in rows if r.updated_at is not None]
+    if current is not None:
+        stamps.append(current)
+    return max(stamps) if stamps else None
 
 def load_cache(db: Session):
-    global index, sections_cache, built
-    if not (os.path.exists(INDEX_PATH) and os.path.exists(META_PATH)):
+    """
+    Open the live artifact version. Only file reads and memory maps, no db work, so
+    the hot reload inside ensure_index holds load_lock for as little as possible.
+    """
+    global index, index_meta, index_path, index_file_id, sections_cache, section_courses, section_lexical, section_summary, built
+    path = artifacts.current_path(INDEX_FILE)
+    meta_path = artifacts.current_path(SECTION_META_FILE)
+    course_path = artifacts.current_path(SECTION_COURSE_FILE)
+    lex_path = artifacts.current_path(SECTION_LEX_FILE)
+    summary_path = artifacts.current_path(SECTION_SUMMARY_FILE)
+    if path is None or meta_path is None or course_path is None or lex_path is None or summary_path is None:
         return False
     try:
-        index = faiss.read_index(INDEX_PATH)
-        ids = np.load(META_PATH).tolist()
-        rows = (
-            db.query(CourseSection)
-            .filter(CourseSection.section_id.in_(ids))
-            .all()
-        )
-        sections_cache = [
-            {
-                "section_id": s.section_id,
-                "course_id": s.course_id,
-                "section_code": s.section_code,
-                "description": s.description,
-            }
-            for s in rows
-        ]
-        built = True
-        return True
+        file_id = artifacts.file_id(INDEX_FILE)
+        new_index, new_meta = ann_index.read_index(path, INDEX_CONFIG)
+        if new_index is None:
+            return False
+        # metadata as of the build; sections deleted since then are dropped on the next sync
+        new_cache = ColumnStore.open(meta_path)
+        if new_cache.schema != SECTION_META_SCHEMA:
+            return False
+        new_courses = ColumnStore.open(course_path)
+        if new_courses.schema != COURSE_JOIN_SCHEMA:
+            return False
+        new_lexical = LexicalIndex.open(lex_path)
+        summary = SummaryIndex.open(summary_path)
     except Exception:
         return False
+    index, index_meta, index_path, index_file_id = new_index, new_meta, path, file_id
+    sections_cache, section_courses, section_lexical = new_cache, new_courses, new_lexical
+    section_summary = summary
+    built = True
+    return True
 
-def build_index(db: Session):
-    global index, sections_cache, built
-    rows = db.query(CourseSection).all()
-    texts = []
-    sections_cache = []
-    for s in rows:
-        desc = (s.description or "").strip()
-        lo = (s.learning_objectives or "").strip()
-        if not desc:
-            continue
-        combined = f"{desc} {lo}".strip()
-        sections_cache.append({
-            "section_id": s.section_id,
-            "course_id": s.course_id,
-            "section_code": s.section_code,
-            "description": s.description,
-        })
-        texts.append(combined)
-    if not texts:
-        index = None
+def build_index(db: Session, persist: bool = True, workers: int | None = None):
+    """
+    Streaming build: pages course_sections by primary key and encodes / adds
+    build_chunk() rows at a time, so embeddings never sit in memory all at
+    once (IVF types keep a training sample and spill the rest to disk). Section
+    records go the same way, each chunk appended to the column file by a
+    ColumnWriter, and the course joins are streamed into theirs in
+    build_course_joins; what stays in memory per row is a few integers.
+    The next page is fetched on a prefetch thread while the current one encodes.
+    workers > 1 spreads encoding over a process pool (default INDEX_ENCODE_WORKERS).
+    persist=False leaves publishing to the caller (see scripts/build_index.py).
+    """
+    global index, index_meta, index_path, sections_cache, section_courses, section_lexical, section_summary, built
+
+    base = section_query(db).filter(CourseSection.description.isnot(None))
+    builder = ann_index.IndexBuilder(
+        INDEX_CONFIG,
+        embedder.dim,
+        db.query(CourseSection).filter(CourseSection.description.isnot(None)).count(),
+    )
+    lexical = LexicalBuilder()
+    records = ColumnWriter("section_id", SECTION_META_SCHEMA)
+    watermark = None
+
+    with build_encoder(workers) as encoder:
+        pages = iter_keyset(base, CourseSection.section_id, build_chunk(encoder))
+        batches = index_batches(pages, "section_id", section_text, section_lexical_text, section_record)
+        for ids, texts, lex_texts, chunk, watermark in prefetch(batches):
+            if texts:
+                builder.add(encoder.encode(texts), ids)
+                lexical.add(ids, lex_texts)
+                records.add(chunk)
+
+    new_store = records.finish()
+    if not new_store.n:
+        index, index_meta, index_path, sections_cache = None, None, None, section_store([])
+        section_courses, section_lexical = course_store([]), None
+        section_summary = SummaryBuilder().finish([], [])
         built = True
         return
-    embeddings = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dim)
-    index.add(embeddings)
-    save_cache()
+
+    new_index, new_meta = builder.finish()
+    new_meta["watermark"] = watermark.isoformat() if watermark else None
+    new_meta["encode"] = encoder.stats()
+    new_meta["embed_backend"] = EMBED_BACKEND
+    new_courses, summary = build_course_joins(db, new_store)
+
+    index, index_meta, index_path = new_index, new_meta, None
+    sections_cache, section_courses, section_lexical = new_store, new_courses, lexical.finish()
+    section_summary = summary
     built = True
+    if persist:
+        save_cache()
 
-def ensure_index(db: Session):
-    global built
-    if built:
-        return
-    if load_cache(db):
+def sync_index(db: Session, persist: bool = True):
+    """
+    Bring the section index up to date without a full rebuild: re-embed only the
+    rows with updated_at >= the stored watermark, drop rows that were deleted or
+    lost their description, then persist the new watermark. Changed rows are paged
+    by primary key and encoded build_chunk() rows at a time like build_index, and
+    the metadata store is merged with them row by row (merge_stores).
+    Falls back to build_index when there's nothing to sync against.
+    """
+    global index, index_meta, index_path, sections_cache, section_courses, section_lexical, section_summary
+
+    if not built:
+        load_cache(db)
+    if index is None or not index_meta.get("watermark") or section_lexical is None:
+        build_index(db, persist)
+        return {"mode": "rebuild", "ntotal": index.ntotal if index is not None else 0}
+
+    watermark = datetime.fromisoformat(index_meta["watermark"])
+    # >= so rows written in the same second as the last sync aren't missed; re-embedding them is harmless
+    since = CourseSection.updated_at >= watermark
+    # ids + stamps first, so the replaced vectors can be removed before any are re-added
+    changed = db.query(CourseSection.section_id, CourseSection.updated_at).filter(since).all()
+    changed_ids = {sid for sid, _ in changed}
+
+    indexed = set(ann_index.index_ids(index).tolist())
+    live = {sid for (sid,) in db.query(CourseSection.section_id)}
+    deleted = indexed - live
+    remove_ids = deleted | (changed_ids & indexed)
+
+    new_meta = dict(index_meta)
+    new_index = ann_index.apply_changes(index, new_meta, remove_ids, None, [], index_path)
+    lexical = LexicalBuilder(section_lexical, remove_ids)
+    updates = ColumnWriter("section_id", SECTION_META_SCHEMA)
+    added = 0
+
+    with build_encoder() as encoder:
+        pages = iter_keyset(section_query(db).filter(since), CourseSection.section_id, build_chunk(encoder))
+        # rows that started matching after the snapshot weren't removed above; the next sync takes them
+        batches = index_batches(pages, "section_id", section_text, section_lexical_text, section_record, changed_ids)
+        for ids, texts, lex_texts, chunk, _ in prefetch(batches):
+            if texts:
+                new_index.add_with_ids(encoder.encode(texts), np.asarray(ids, dtype=np.int64))
+                lexical.add(ids, lex_texts)
+                updates.add(chunk)
+                added += len(ids)
+
+    new_meta["ntotal"] = int(new_index.ntotal)
+    watermark = max_updated_at(changed, watermark)
+    new_meta["watermark"] = watermark.isoformat()
+
+    new_store = merge_stores(sections_cache, updates.finish(), remove_ids, INDEX_BUILD_CHUNK)
+    # re-hydrated for every indexed course, so textbook / college edits are picked up too
+    new_courses, summary = build_course_joins(db, new_store)
+
+    # swap everything at once; in-flight searches keep using the old objects
+    index, index_meta, index_path = new_index, new_meta, None
+    sections_cache, section_courses, section_lexical = new_store, new_courses, lexical.finish()
+    section_summary = summary
+    if persist:
+        save_cache()
+
+    return {
+        "mode": "incremental",
+        "removed": len(remove_ids),
+        "added": added,
+        "ntotal": index.ntotal,
+        "watermark": new_meta["watermark"],
+    }
+
+def ensure_index(db: Session, max_age: float = RELOAD_CHECK_SECONDS):
+    """
+    Load the live artifact on first use and hot-reload it whenever a newer build
+    has been published (checked at most every max_age seconds).
+    """
+    if built and artifacts.file_id(INDEX_FILE, max_age) == index_file_id:
         return
-    build_index(db)
-
-def get_textbooks_for_section(db: Session, course_id: int):
-    q = (
-        db.query(Textbook)
-        .join(course_textbooks, course_textbooks.c.isbn_13 == Textbook.isbn_13)
-        .filter(course_textbooks.c.course_id == course_id)
-        .all()
-    )
-    return [
-        {
-            "isbn_13": t.isbn_13,
-            "title": t.title,
-            "edition": t.edition,
-            "publisher": t.publisher,
-            "contributors": t.contributors,
-            "isbn_10": t.isbn_10,
-            "asin": t.asin,
-            "publication_year": t.publication_year,
-            "print_length": t.print_length,
-            "item_weight": t.item_weight,
-            "dimensions": t.dimensions,
-            "url": t.url,
-            "list_price": float(t.list_price) if t.list_price else None,
-        }
-        for t in q
-    ]
+    with load_lock:
+        current = artifacts.file_id(INDEX_FILE)
+        if built and current == index_file_id:
+            return
+        if current is not None and load_cache(db):
+            return
+        if built:
+            # newer artifact unreadable (e.g. other index type configured); keep serving the old one
+            return
+        if not BUILD_ON_REQUEST:
+            raise HTTPException(503, "vector index not built yet, run scripts/build_index.py")
+        build_index(db)
+
+def textbook_json(t: Textbook):
+    return {
+        "isbn_13": t.isbn_13,
+        "title": t.title,
+        "edition": t.edition,
+        "publisher": t.publisher,
+        "contributors": t.contributors,
+        "isbn_10": t.isbn_10,
+        "asin": t.asin,
+        "publication_year": t.publication_year,
+        "print_length": t.print_length,
+        "item_weight": t.item_weight,
+        "dimensions": t.dimensions,
+        "url": t.url,
+        "list_price": float(t.list_price) if t.list_price else None,
+    }
 
-@router.post("/search")
-def search_vector(body: SearchBody, db: Session = Depends(get_db)):
-    ensure_index(db) # trigger index loading on request not on app startup otherwise dev restarts take long
-    #emb = model.encode([body.q], convert_to_numpy=True, normalize_embeddings=True)
-    emb = model.encode(["q"], convert_to_numpy=True, normalize_embeddings=True) # TODO: fix this shit
-    scores, idxs = index.search(emb, body.k)
+def college_json(c: College):
+    return {
+        "college_id": c.college_id,
+        "name": c.name,
+        "abbreviation": c.abbreviation,
+        "address": c.addr,
+        "city": c.city,
+        "state": c.state,
+        "zip": c.zip,
+        "latitude": c.latitude,
+        "longitude": c.longitude,
+    }
 
-    thresh = body.s
-    results = []
+def department_json(d: Department):
+    return {
+        "department_id": d.department_id,
+        "name": d.name,
+        "code": d.code,
+    }
 
-    summary_colleges = {}
-    publisher_counts = {}
-    college_publisher_counts = {}
+IN_CHUNK = 1000
 
-    for i, score in zip(idxs[0], scores[0]):
-        if score < thresh:
-            continue
+def chunked(ids, size=IN_CHUNK):
+    ids = list(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
 
-        sec_dict = sections_cache[i]
-        sec_id = sec_dict["section_id"]
+def hydrate_courses(db: Session, course_ids):
+    """
+    Bulk-load college, department and textbooks for a set of course ids.
+    Runs two IN (...) queries per 1000 ids instead of two queries per hit.
+    Returns {course_id: (college, department, textbooks)} with ORM objects
+    for college/department and JSON dicts for textbooks.
+    """
+    course_ids = {cid for cid in course_ids if cid is not None}
+    out = {cid: (None, None, []) for cid in course_ids}
+    if not course_ids:
+        return out
 
-        college, department = (
-            db.query(College, Department)
-            .join(Department, Department.college_id == College.college_id)
-            .join(Course, Course.department_id == Department.department_id)
-            .filter(Course.course_id == sec_dict["course_id"])
-            .first()
-            or (None, None)
+    for chunk in chunked(course_ids):
+        rows = (
+            db.query(Course.course_id, College, Department)
+            .join(Department, Course.department_id == Department.department_id)
+            .join(College, Department.college_id == College.college_id)
+            .filter(Course.course_id.in_(chunk))
+            .all()
         )
+        for course_id, college, department in rows:
+            out[course_id] = (college, department, out[course_id][2])
 
-        college_json = None
-        department_json = None
-        college_id = None
-
-        if college:
-            college_id = college.college_id
-            college_json = {
-                "college_id": college.college_id,
-                "name": college.name,
-                "abbreviation": college.abbreviation,
-                "address": college.addr,
-                "city": college.city,
-                "state": college.state,
-                "zip": college.zip,
-                "latitude": college.latitude,
-                "longitude": college.longitude,
-            }
-
-            if college_id not in summary_colleges:
-                summary_colleges[college_id] = {
-                    "name": college.name,
-                    "abbreviation": college.abbreviation,
-                    "course_count": 0,
-                    "city": college.city,
-                    "state": college.state,
-                    "latitude": college.latitude,
-                    "longitude": college.longitude,
-                }
-
-            summary_colleges[college_id]["course_count"] += 1
-
-        if department:
-            department_json = {
-                "department_id": department.department_id,
-                "name": department.name,
-                "code": department.code,
-            }
-
-        textbooks = get_textbooks_for_section(db, sec_dict["course_id"])
-
-        # GLOBAL publisher count
-        for t in textbooks:
-            pub = t.get("publisher")
-            if not pub:
-                continue
+        books = (
+            db.query(course_textbooks.c.course_id, Textbook)
+            .join(Textbook, course_textbooks.c.isbn_13 == Textbook.isbn_13)
+            .filter(course_textbooks.c.course_id.in_(chunk))
+            .all()
+        )
+        for course_id, t in books:
+            out[course_id][2].append(textbook_json(t))
 
-            publisher_counts[pub] = publisher_counts.get(pub, 0) + 1
+    return out
 
-            if college_id:
-                if college_id not in college_publisher_counts:
-                    college_publisher_counts[college_id] = {}
-                college_publisher_counts[college_id][pub] = (
-                    college_publisher_counts[college_id].get(pub, 0) + 1
-                )
+# courses hydrated per step of build_course_joins
+COURSE_JOIN_CHUNK = 5000
 
-        results.append({
-            "section_id": sec_id,
-            "section_code": sec_dict["section_code"],
-            "course_id": sec_dict["course_id"],
-            "score": float(score),
-            "description": sec_dict["description"],
-            "college": college_json,
-            "department": department_json,
-            "textbooks": textbooks,
-        })
-
-    summary = {
-        "college_count": len(summary_colleges),
-        "colleges": summary_colleges,
-        "publisher_counts": publisher_counts,
-        "publishers_by_college": college_publisher_counts,
+def build_course_joins(db: Session, sections: ColumnStore):
+    """
+    (course join store, summary) for the courses of the indexed sections: college,
+    department and textbooks hydrated COURSE_JOIN_CHUNK courses at a time and
+    streamed into the column file, and the college / publisher summary arrays
+    over the sections from the same data.
+    """
+    course_ids = np.unique(section_course_ids(sections))
+    course_ids = course_ids[course_ids >= 0].tolist()
+    store = ColumnWriter("course_id", COURSE_JOIN_SCHEMA)
+    summary = SummaryBuilder()
+    for start in range(0, len(course_ids), COURSE_JOIN_CHUNK):
+        hydrated = hydrate_courses(db, course_ids[start:start + COURSE_JOIN_CHUNK])
+        chunk = []
+        for course_id, (college, department, textbooks) in hydrated.items():
+            college = college_json(college) if college else None
+            chunk.append({
+                "course_id": course_id,
+                "college": college,
+                "department": department_json(department) if department else None,
+                "textbooks": textbooks,
+            })
+            summary.add(course_id, college, textbooks)
+        store.add(chunk)
+    return store.finish(), summary.finish(sections.ids, section_course_ids(sections))
+
+def hit_record(sec: dict, college, department, textbooks):
+    return {
+        "section_id": sec["section_id"],
+        "section_code": sec["section_code"],
+        "course_id": sec["course_id"],
+        "description": sec["description"],
+        "college": college,
+        "department": department,
+        "textbooks": textbooks,
     }
 
+def hydrate_hits(db: Session, ids):
+    """
+    Result dicts (minus score) for faiss labels. Section fields come from the
+    metadata store, college / department / textbooks from the course join store;
+    courses it doesn't have (added since the last build / sync) fall back to the db.
+    """
+    out = {}
+    misses = {}
+    for i in ids:
+        sec = sections_cache[i]
+        if sec["course_id"] is None:
+            out[i] = hit_record(sec, None, None, [])
+            continue
+        course = section_courses.get(sec["course_id"])
+        if course is None:
+            misses[i] = sec
+            continue
+        out[i] = hit_record(sec, course["college"], course["department"], course["textbooks"])
+
+    if misses:
+        hydrated = hydrate_courses(db, (sec["course_id"] for sec in misses.values()))
+        for i, sec in misses.items():
+            college, department, textbooks = hydrated[sec["course_id"]]
+            out[i] = hit_record(
+                sec,
+                college_json(college) if college else None,
+                department_json(department) if department else None,
+                textbooks,
+            )
+    return out
+
+def filter_colleges(db: Session, body: SearchBody):
+    """College ids allowed by the state / radius filters, None when neither is set."""
+    if body.state is None and body.radius_km is None:
+        return None
+
+    q = db.query(College.college_id, College.latitude, College.longitude)
+    if body.state is not None:
+        q = q.filter(College.state == body.state)
+    if body.radius_km is not None:
+        if body.lat is None or body.lng is None:
+            raise HTTPException(400, "radius_km needs lat and lng")
+        min_lat, max_lat, min_lng, max_lng = geo.bounding_box(body.lat, body.lng, body.radius_km)
+        q = q.filter(College.latitude.between(min_lat, max_lat))
+        if min_lng is not None:
+            q = q.filter(College.longitude.between(min_lng, max_lng))
+    rows = q.all()
+
+    if body.radius_km is not None:
+        rows = [r for r in rows if r.longitude is not None]
+        if rows:
+            dist = geo.haversine_km(body.lat, body.lng, [r.latitude for r in rows], [r.longitude for r in rows])
+            rows = [r for r, d in zip(rows, dist) if d <= body.radius_km]
+    return np.array([r.college_id for r in rows], dtype=np.int64)
+
+def filter_ids(store: ColumnStore, body: SearchBody, colleges):
+    """
+    Labels in a metadata store that pass the body's filters, or None when there
+    are none. Evaluated with numpy over the store's columns and handed to the ann
+    search as an id selector (utils/ann_index.py). colleges is filter_colleges().
+    """
+    if "semester" not in store.schema and (body.semester is not None or body.term_year is not None):
+        raise HTTPException(400, "semester / term_year filters only apply to section search")
+
+    mask = np.ones(len(store), dtype=bool)
+    filtered = False
+
+    def match(name, allowed):
+        values, nulls = store.column(name)
+        return np.isin(values, allowed) & (nulls == 0)
+
+    if body.college_id is not None:
+        mask &= match("college_id", [body.college_id])
+        filtered = True
+    if body.department_id is not None:
+        mask &= match("department_id", [body.department_id])
+        filtered = True
+    if body.term_year is not None:
+        mask &= match("term_year", [body.term_year])
+        filtered = True
+    if body.semester is not None:
+        wanted = body.semester.strip().lower()
+        codes = [i for i, v in enumerate(store.vocab["semester"]) if v.strip().lower() == wanted]
+        mask &= match("semester", codes)
+        filtered = True
+
+    if colleges is not None:
+        mask &= match("college_id", colleges)
+        filtered = True
+
+    return store.ids[mask] if filtered else None
+
+def rank(body: SearchBody, colleges, store: ColumnStore, ann, meta, cfg, lexical: LexicalIndex | None):
+    """
+    Best-first (label, score) hits for body.mode, all present in store. Scores are
+    cosine similarity (vector), BM25 (lexical) or the fused RRF score (hybrid).
+    No db access (colleges is filter_colleges()), so it can run off the event loop.
+    """
+    if ann is None:
+        return []
+    allowed = filter_ids(store, body, colleges)
+    depth = body.k if body.mode != "hybrid" else max(body.k, HYBRID_DEPTH)
+
+    vector = []
+    if body.mode != "lexical":
+        emb = get_query_cache().encode([body.q])
+        scores, idxs = ann_index.search(
+            ann, meta, cfg, emb, depth,
+            nprobe=body.nprobe, ef_search=body.ef_search, ids=allowed,
+        )
+        # faiss pads with -1 when k > ntotal
+        vector = [
+            (int(i), float(score)) for i, score in zip(idxs[0], scores[0])
+            if i >= 0 and score >= body.s and i in store
+        ]
+        if body.mode == "vector":
+            return vector
+
+    lexical_hits = [
+        (i, score) for i, score in (lexical.search(body.q, depth, ids=allowed) if lexical else [])
+        if i in store
+    ]
+    if body.mode == "lexical":
+        return lexical_hits
+    return rrf([vector, lexical_hits], body.k)
+
+def page_hits(kind: str, body: SearchBody, run_search):
+    """
+    (page, extra, next_cursor, total) for a search. Without a cursor run_search()
+    ranks and returns (hits, extra); when more than one page results, the full
+    list is kept in result_cursors so later pages only slice it.
+    """
+    if body.cursor:
+        decoded = decode_cursor(body.cursor)
+        if decoded is None:
+            raise HTTPException(400, "malformed cursor")
+        token, offset = decoded
+        entry = result_cursors.get(token, kind)
+        if entry is None:
+            raise HTTPException(410, "cursor expired, run the search again")
+        hits, extra = entry
+    else:
+        hits, extra = run_search()
+        token, offset = None, 0
+
+    size = body.page_size or len(hits)
+    page = hits[offset:offset + size]
+    next_cursor = None
+    if offset + size < len(hits):
+        if token is None:
+            token = result_cursors.put(kind, hits, extra)
+        next_cursor = encode_cursor(token, offset + size)
+    return page, extra, next_cursor, len(hits)
+
+def search_colleges_filter(db: Session, body: SearchBody):
+    # a cursor page reuses the ranked list, so the filters were already applied
+    return None if body.cursor else filter_colleges(db, body)
+
+def section_page(body: SearchBody, colleges):
+    """(page, summary, next_cursor, total) for a section search; db-free like rank()."""
+    def run_search():
+        hits = rank(body, colleges, sections_cache, index, index_meta, INDEX_CONFIG, section_lexical)
+        # colleges / publishers over the whole hit set from the precomputed arrays (utils/result_summary.py)
+        return hits, section_summary.summarize([i for i, _ in hits])
+
+    page, summary, next_cursor, total = page_hits("sections", body, run_search)
+    # only the page is hydrated; an index swap since the first page may have dropped some ids
+    page = [(i, score) for i, score in page if i in sections_cache]
+    return page, summary, next_cursor, total
+
+def section_response(body: SearchBody, page, summary, next_cursor, total, hydrated):
+    results = [{**hydrated[i], "score": score} for i, score in page]
     return {
         "summary": summary,
         "results": results,
-        "dev": {"k": body.k, "q": body.q, "s": body.s}
+        "total": total,
+        "next_cursor": next_cursor,
+        "dev": {"k": body.k, "q": body.q, "s": body.s, "mode": body.mode}
     }
 
-# ===== PROFESSOR VECTOR CACHE =====
+@router.post("/search")
+def search_vector(body: SearchBody, db: Session = Depends(get_read_db)):
+    ensure_index(db) # trigger index loading on request not on app startup otherwise dev restarts take long
+    page, summary, next_cursor, total = section_page(body, search_colleges_filter(db, body))
+    hydrated = hydrate_hits(db, (i for i, _ in page))
+    return section_response(body, page, summary, next_cursor, total, hydrated)
 
-PROF_INDEX_PATH = "./.cache/prof_vector_cache.faiss"
-PROF_META_PATH = "./.cache/prof_vector_cache.npy"
+# ===== PROFESSOR VECTOR CACHE =====
 
-os.makedirs("./.cache", exist_ok=True)
+PROF_INDEX_FILE = "prof_vector_cache.faiss"
+# professor metadata per faiss label, same column file format as SECTION_META_FILE
+PROF_META_FILE = "professors.col"
+PROF_LEX_FILE = "professors.lex"
+PROF_META_SCHEMA = {
+    "name": "str",
+    "title": "str",
+    "emails": "json",
+    "primary_email": "str",
+    "bio": "str",
+    "department_id": "int",
+    "college_id": "int",
+}
+
+PROF_INDEX_CONFIG = ann_index.index_config("PROF")
 
 prof_index = None
-prof_cache = None
+prof_index_meta = None
+prof_index_path = None
+prof_file_id = None
+prof_cache = ColumnStore.from_records([], "professor_id", PROF_META_SCHEMA)  # professor_id -> professor dict
+prof_lexical = None
 prof_built = False
 
-def save_prof_cache():
-    faiss.write_index(prof_index, PROF_INDEX_PATH)
-    np.save(PROF_META_PATH, prof_cache, allow_pickle=True)
+def save_prof_cache(stage: artifacts.Stage | None = None):
+    global prof_file_id
+    if stage is None:
+        with artifacts.publish() as stage:
+            save_prof_cache(stage)
+        prof_file_id = artifacts.file_id(PROF_INDEX_FILE)
+        return
+    ann_index.write_index(prof_index, prof_index_meta, stage.path(PROF_INDEX_FILE))
+    prof_cache.write(stage.path(PROF_META_FILE))
+    prof_lexical.write(stage.path(PROF_LEX_FILE))
 
+def prof_store(records):
+    return ColumnStore.from_records(records, "professor_id", PROF_META_SCHEMA)
 
 def load_prof_cache(db: Session):
-    global prof_index, prof_cache, prof_built
+    global prof_index, prof_index_meta, prof_index_path, prof_file_id, prof_cache, prof_lexical, prof_built
 
-    if not os.path.exists(PROF_INDEX_PATH) or not os.path.exists(PROF_META_PATH):
+    path = artifacts.current_path(PROF_INDEX_FILE)
+    meta_path = artifacts.current_path(PROF_META_FILE)
+    lex_path = artifacts.current_path(PROF_LEX_FILE)
+    if path is None or meta_path is None or lex_path is None:
         return False
 
     try:
-        prof_index = faiss.read_index(PROF_INDEX_PATH)
-        prof_cache = np.load(PROF_META_PATH, allow_pickle=True).tolist()
-        prof_built = True
-        return True
+        file_id = artifacts.file_id(PROF_INDEX_FILE)
+        new_index, new_meta = ann_index.read_index(path, PROF_INDEX_CONFIG)
+        if new_index is None:
+            return False
+        new_cache = ColumnStore.open(meta_path)
+        if new_cache.schema != PROF_META_SCHEMA:
+            return False
+        new_lexical = LexicalIndex.open(lex_path)
     except Exception:
         return False
 
+    prof_index, prof_index_meta, prof_index_path, prof_file_id = new_index, new_meta, path, file_id
+    prof_cache, prof_lexical = new_cache, new_lexical
+    prof_built = True
+    return True
+
 def flatten_json(value) -> str:
     """
     Convert JSON-like data (dict / list / scalar) into a readable string
@@ -294,124 +837,205 @@ def flatten_json(value) -> str:
     return ""
 
 
-def build_prof_index(db: Session):
-    global prof_index, prof_cache, prof_built
+def prof_text(p: Professor):
+    # --- high-signal text ---
+    name = p.name or ""
+    title = p.title or ""
+    bio = p.bio or ""
 
-    rows = (
-        db.query(Professor)
-        .join(Department, isouter=True)
-        .join(College, isouter=True)
-        .order_by(Professor.professor_id)
-        .all()
-    )
+    research = flatten_json(p.research_interests)
+    publications = flatten_json(p.publications)
+    cv_text = flatten_json(p.cv_data)
 
-    texts = []
-    prof_cache = []
+    dept_name = p.department.name if p.department else ""
+    college_name = p.college.name if p.college else ""
 
-    for p in rows:
-        # --- high-signal text ---
-        name = p.name or ""
-        title = p.title or ""
-        bio = p.bio or ""
+    # intentionally structured text
+    text = f"""
+    {name}
+    {title}
+    {dept_name}
+    {college_name}
 
-        research = flatten_json(p.research_interests)
-        publications = flatten_json(p.publications)
-        cv_text = flatten_json(p.cv_data)
+    Research interests:
+    {research}
 
-        dept_name = p.department.name if p.department else ""
-        college_name = p.college.name if p.college else ""
+    Publications:
+    {publications}
 
-        # intentionally structured text
-        text = f"""
-        {name}
-        {title}
-        {dept_name}
-        {college_name}
+    Background:
+    {bio}
+    {cv_text}
+    """.strip()
 
-        Research interests:
-        {research}
+    return text or None
 
-        Publications:
-        {publications}
 
-        Background:
-        {bio}
-        {cv_text}
-        """.strip()
+def prof_record(p: Professor):
+    primary_email = None
+    if isinstance(p.emails, list) and p.emails:
+        primary_email = p.emails[0]
 
-        if not text:
-            continue
+    return {
+        "professor_id": p.professor_id,
+        "name": p.name,
+        "title": p.title,
+        "emails": p.emails,
+        "primary_email": primary_email,
+        "bio": p.bio,
+        "department_id": p.department_id,
+        "college_id": p.college_id,
+    }
 
-        primary_email = None
-        if isinstance(p.emails, list) and p.emails:
-            primary_email = p.emails[0]
-
-        prof_cache.append({
-            "professor_id": p.professor_id,
-            "name": p.name,
-            "title": p.title,
-            "emails": p.emails,
-            "primary_email": primary_email,
-            "bio": p.bio,
-            "department_id": p.department_id,
-            "college_id": p.college_id,
-        })
 
-        texts.append(text)
+def prof_lexical_text(p: Professor):
+    dept_name = p.department.name if p.department else None
+    college_name = p.college.name if p.college else None
+    return " ".join(t for t in (p.name, p.title, dept_name, college_name) if t)
 
-    if not texts:
-        prof_built = True
-        return
 
-    embeddings = model.encode(
-        texts,
-        convert_to_numpy=True,
-        normalize_embeddings=True,
+def build_prof_index(db: Session, persist: bool = True, workers: int | None = None):
+    """Streaming professor build, same paging, encoding and memory profile as build_index."""
+    global prof_index, prof_index_meta, prof_index_path, prof_cache, prof_lexical, prof_built
+
+    base = (
+        db.query(Professor)
+        .options(joinedload(Professor.department), joinedload(Professor.college))
+    )
+    builder = ann_index.IndexBuilder(
+        PROF_INDEX_CONFIG,
+        embedder.dim,
+        db.query(Professor).count(),
     )
+    lexical = LexicalBuilder()
+    records = ColumnWriter("professor_id", PROF_META_SCHEMA)
+    watermark = None
+
+    with build_encoder(workers) as encoder:
+        pages = iter_keyset(base, Professor.professor_id, build_chunk(encoder))
+        batches = index_batches(pages, "professor_id", prof_text, prof_lexical_text, prof_record)
+        for ids, texts, lex_texts, chunk, watermark in prefetch(batches):
+            if texts:
+                builder.add(encoder.encode(texts), ids)
+                lexical.add(ids, lex_texts)
+                records.add(chunk)
+
+    new_store = records.finish()
+    if not new_store.n:
+        prof_index, prof_index_meta, prof_index_path, prof_cache = None, None, None, prof_store([])
+        prof_lexical = None
+        prof_built = True
+        return
 
-    dim = embeddings.shape[1]
-    prof_index = faiss.IndexFlatIP(dim)
-    prof_index.add(embeddings)
+    new_index, new_meta = builder.finish()
+    new_meta["watermark"] = watermark.isoformat() if watermark else None
+    new_meta["encode"] = encoder.stats()
+    new_meta["embed_backend"] = EMBED_BACKEND
 
-    save_prof_cache()
+    prof_index, prof_index_meta, prof_index_path, prof_cache = new_index, new_meta, None, new_store
+    prof_lexical = lexical.finish()
     prof_built = True
+    if persist:
+        save_prof_cache()
+
+def sync_prof_index(db: Session, persist: bool = True):
+    """Incremental professor index update, same rules as sync_index."""
+    global prof_index, prof_index_meta, prof_index_path, prof_cache, prof_lexical
+
+    if not prof_built:
+        load_prof_cache(db)
+    if prof_index is None or not prof_index_meta.get("watermark") or prof_lexical is None:
+        build_prof_index(db, persist)
+        return {"mode": "rebuild", "ntotal": prof_index.ntotal if prof_index is not None else 0}
+
+    watermark = datetime.fromisoformat(prof_index_meta["watermark"])
+    since = Professor.updated_at >= watermark
+    changed = db.query(Professor.professor_id, Professor.updated_at).filter(since).all()
+    changed_ids = {pid for pid, _ in changed}
+
+    indexed = set(ann_index.index_ids(prof_index).tolist())
+    live = {pid for (pid,) in db.query(Professor.professor_id)}
+    deleted = indexed - live
+    remove_ids = deleted | (changed_ids & indexed)
+
+    new_meta = dict(prof_index_meta)
+    new_index = ann_index.apply_changes(prof_index, new_meta, remove_ids, None, [], prof_index_path)
+    lexical = LexicalBuilder(prof_lexical, remove_ids)
+    updates = ColumnWriter("professor_id", PROF_META_SCHEMA)
+    added = 0
+    base = (
+        db.query(Professor)
+        .options(joinedload(Professor.department), joinedload(Professor.college))
+        .filter(since)
+    )
 
-def ensure_prof_index(db: Session):
-    global prof_built
-    if prof_built:
-        return
-    if load_prof_cache(db):
-        return
-    build_prof_index(db)
-
+    with build_encoder() as encoder:
+        pages = iter_keyset(base, Professor.professor_id, build_chunk(encoder))
+        batches = index_batches(pages, "professor_id", prof_text, prof_lexical_text, prof_record, changed_ids)
+        for ids, texts, lex_texts, chunk, _ in prefetch(batches):
+            if texts:
+                new_index.add_with_ids(encoder.encode(texts), np.asarray(ids, dtype=np.int64))
+                lexical.add(ids, lex_texts)
+                updates.add(chunk)
+                added += len(ids)
+
+    new_meta["ntotal"] = int(new_index.ntotal)
+    watermark = max_updated_at(changed, watermark)
+    new_meta["watermark"] = watermark.isoformat()
+
+    new_store = merge_stores(prof_cache, updates.finish(), remove_ids, INDEX_BUILD_CHUNK)
+    prof_index, prof_index_meta, prof_index_path, prof_cache = new_index, new_meta, None, new_store
+    prof_lexical = lexical.finish()
+    if persist:
+        save_prof_cache()
 
-@router.post("/professors")
-def search_professors(body: SearchBody, db: Session = Depends(get_db)):
-    ensure_prof_index(db)
-
-    if prof_index is None:
-        return {"results": []}
+    return {
+        "mode": "incremental",
+        "removed": len(remove_ids),
+        "added": added,
+        "ntotal": prof_index.ntotal,
+        "watermark": new_meta["watermark"],
+    }
 
-    q_emb = model.encode(
-        [body.q],
-        convert_to_numpy=True,
-        normalize_embeddings=True,
+def ensure_prof_index(db: Session, max_age: float = RELOAD_CHECK_SECONDS):
+    """Professor counterpart of ensure_index."""
+    if prof_built and artifacts.file_id(PROF_INDEX_FILE, max_age) == prof_file_id:
+        return
+    with load_lock:
+        current = artifacts.file_id(PROF_INDEX_FILE)
+        if prof_built and current == prof_file_id:
+            return
+        if current is not None and load_prof_cache(db):
+            return
+        if prof_built:
+            return
+        if not BUILD_ON_REQUEST:
+            raise HTTPException(503, "professor index not built yet, run scripts/build_index.py")
+        build_prof_index(db)
+
+
+def prof_page(body: SearchBody, colleges):
+    """(hits as (professor dict, score), next_cursor, total) for a professor search; db-free like rank()."""
+    page, _, next_cursor, total = page_hits(
+        "professors", body,
+        lambda: (rank(body, colleges, prof_cache, prof_index, prof_index_meta, PROF_INDEX_CONFIG, prof_lexical), None),
     )
-
-    scores, idxs = prof_index.search(q_emb, body.k)
-
+    # faiss label -> metadata row is O(1) (see utils/columnar.py); decode each hit of the page once
+    hits = [(p, score) for p, score in ((prof_cache.get(idx), score) for idx, score in page) if p is not None]
+    return hits, next_cursor, total
+
+def load_departments(db: Session, hits):
+    dept_ids = {p["department_id"] for p, _ in hits} - {None}
+    depts = {}
+    for chunk in chunked(dept_ids):
+        for d in db.query(Department).filter(Department.department_id.in_(chunk)).all():
+            depts[d.department_id] = d
+    return depts
+
+def prof_response(body: SearchBody, hits, depts, next_cursor, total):
     results = []
-    for idx, score in zip(idxs[0], scores[0]):
-        if score < body.s:
-            continue
-
-        p = prof_cache[idx]
-
-        dept = (
-            db.query(Department)
-            .filter(Department.department_id == p["department_id"])
-            .first()
-        )
+    for p, score in hits:
+        dept = depts.get(p["department_id"])
 
         results.append({
             "professor_id": p["professor_id"],
@@ -420,15 +1044,104 @@ def search_professors(body: SearchBody, db: Session = Depends(get_db)):
             "emails": p["emails"],
             "primary_email": p["primary_email"],
             "bio": p["bio"],
-            "score": float(score),
-            "department": {
-                "department_id": dept.department_id,
-                "name": dept.name,
-                "code": dept.code,
-            } if dept else None,
+            "score": score,
+            "department": department_json(dept) if dept else None,
         })
 
     return {
         "results": results,
-        "dev": {"q": body.q, "k": body.k, "s": body.s},
+        "total": total,
+        "next_cursor": next_cursor,
+        "dev": {"q": body.q, "k": body.k, "s": body.s, "mode": body.mode},
+    }
+
+@router.post("/professors")
+def search_professors(body: SearchBody, db: Session = Depends(get_read_db)):
+    ensure_prof_index(db)
+
+    if prof_index is None:
+        return prof_response(body, [], {}, None, 0)
+
+    hits, next_cursor, total = prof_page(body, search_colleges_filter(db, body))
+    return prof_response(body, hits, load_departments(db, hits), next_cursor, total)
+
+
+@router.post("/refresh")
+def refresh_indexes(db: Session = Depends(get_bulk_db)):
+    # one refresh at a time per worker; searches keep running against the old index until the swap
+    with sync_lock:
+        return {
+            "sections": sync_index(db),
+            "professors": sync_prof_index(db),
+        }
+
+
+def warm_up(load_indexes: bool = True):
+    """
+    Optional startup hook (VECTOR_WARMUP=1 in main.py): load the model, faiss and
+    the live indexes up front so the first search doesn't pay for them.
+    """
+    import faiss  # noqa: F401
+
+    get_query_cache()
+    encode_texts(["warm up"])
+    if load_indexes:
+        db = BulkSessionLocal()
+        try:
+            ensure_index(db, max_age=0)
+            ensure_prof_index(db, max_age=0)
+        finally:
+            db.close()
+
+
+@router.post("/reload")
+def reload_indexes(db: Session = Depends(get_bulk_db)):
+    # pick up a freshly published artifact version now instead of on the next periodic check
+    ensure_index(db, max_age=0)
+    ensure_prof_index(db, max_age=0)
+    return {
+        "version": artifacts.current_version(),
+        "sections": index_meta,
+        "professors": prof_index_meta,
+    }
+
+
+@router.get("/stats")
+def vector_stats():
+    return {
+        "version": artifacts.current_version(),
+        "sections": {
+            "built": built,
+            "index": index_meta,
+            "metadata": {
+                "rows": len(sections_cache),
+                "bytes": sections_cache.nbytes,
+                "mmap": sections_cache.mapped,
+            },
+            "courses": {
+                "rows": len(section_courses),
+                "bytes": section_courses.nbytes,
+                "mmap": section_courses.mapped,
+            },
+            "lexical": section_lexical.stats() if section_lexical else None,
+            "summary": section_summary.stats(),
+        },
+        "professors": {
+            "built": prof_built,
+            "index": prof_index_meta,
+            "metadata": {
+                "rows": len(prof_cache),
+                "bytes": prof_cache.nbytes,
+                "mmap": prof_cache.mapped,
+            },
+            "lexical": prof_lexical.stats() if prof_lexical else None,
+        },
+        "embedder": {
+            "backend": EMBED_BACKEND,
+            "loaded": embedder.loaded,
+            "load_seconds": embedder.load_seconds,
+        },
+        "query_cache": query_cache.stats() if query_cache else None,
+        "result_cursors": result_cursors.stats(),
+        "embed_batcher": embed_batcher.stats() if embed_batcher else None,
     }
@@ -0,0 +1,134 @@
+"""
+Load test: threadpool routes (sync def + SessionLocal) against their /async twins
+(AsyncSession) at high concurrency. Start the app with DB_ASYNC=1, then:
+
+    python -m scripts.bench_async_load --base http://127.0.0.1:8000 --concurrency 256 --duration 20
+
+Each path is hammered by `concurrency` keep-alive connections for `duration`
+seconds, first as-is and then with /async in front. Prints requests/sec, p50 /
+p95 / p99 latency and errors for both. Stdlib HTTP client, so the load generator
+itself doesn't need extra packages.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+# (method, path, body)
+DEFAULT_TARGETS = [
+    ("GET", "/courses/?limit=50", None),
+    ("GET", "/professors/?limit=50&fields=name,title", None),
+    ("POST", "/vector_search/search", {"q": "intro to organic chemistry", "k": 20}),
+]
+
+
+def build_request(host, method, path, body):
+    payload = json.dumps(body).encode() if body is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n"
+    if body is not None:
+        head += f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+    return (head + "\r\n").encode() + payload
+
+
+async def read_response(reader):
+    """(status, keep_alive) of one response, body consumed (Content-Length or chunked)."""
+    version, status = (await reader.readline()).split()[:2]
+    keep_alive = version == b"HTTP/1.1"
+    length, chunked = 0, False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding" and "chunked" in value.lower():
+            chunked = True
+        elif name == "connection":
+            keep_alive = value.strip().lower() != "close"
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return int(status), keep_alive
+
+
+async def worker(host, port, request, deadline, latencies, failures):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            failures["connection"] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        if status >= 400:
+            failures[status] = failures.get(status, 0) + 1
+        else:
+            latencies.append(time.perf_counter() - start)
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run(base, method, path, body, concurrency, duration):
+    url = urlsplit(base)
+    host, port = url.hostname, url.port or 80
+    request = build_request(url.netloc, method, path, body)
+    latencies, failures = [], {"connection": 0}
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(host, port, request, deadline, latencies, failures) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return latencies, {k: v for k, v in failures.items() if v}, elapsed
+
+
+def report(label, latencies, failures, elapsed):
+    if not latencies:
+        print(f"{label:56s} no successful requests  errors {failures}")
+        return 0.0
+    ms = sorted(l * 1000 for l in latencies)
+    pct = lambda p: ms[min(len(ms) - 1, int(len(ms) * p))]
+    rps = len(ms) / elapsed
+    print(
+        f"{label:56s} {rps:8.1f} req/s  p50 {statistics.median(ms):7.1f}ms  "
+        f"p95 {pct(0.95):7.1f}ms  p99 {pct(0.99):7.1f}ms  errors {failures or 0}"
+    )
+    return rps
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--path", action="append", help="GET path to test instead of the defaults (repeatable)")
+    args = parser.parse_args()
+
+    targets = [("GET", p, None) for p in args.path] if args.path else DEFAULT_TARGETS
+    print(f"concurrency {args.concurrency}, {args.duration:.0f}s per run")
+    for method, path, body in targets:
+        sync = report(f"threadpool {method} {path}", *asyncio.run(run(args.base, method, path, body, args.concurrency, args.duration)))
+        async_ = report(f"async      {method} /async{path}", *asyncio.run(run(args.base, method, "/async" + path, body, args.concurrency, args.duration)))
+        if sync and async_:
+            print(f"{'':56s} async / threadpool throughput: {async_ / sync:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Latency / throughput of query encoding with and without the micro-batcher.
+
+    python -m scripts.bench_embed_batching --concurrency 32 --requests 2000
+
+Each request encodes one distinct query (no cache), like a cold search call.
+Prints p50 / p99 latency and QPS for both paths.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from utils.embed_batcher import EmbedBatcher
+
+WORDS = (
+    "intro statistics calculus organic chemistry biology microeconomics history "
+    "psychology linear algebra physics mechanics programming data structures "
+    "accounting marketing sociology anatomy nursing ethics philosophy writing"
+).split()
+
+
+def queries(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(WORDS, size=4)) + f" {i}" for i in range(n)]
+
+
+def run(encode_one, texts, concurrency):
+    latencies = []
+
+    def call(text):
+        start = time.perf_counter()
+        encode_one(text)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(call, texts))
+    elapsed = time.perf_counter() - start
+
+    lat = np.array(latencies) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(lat, 50)), 2),
+        "p99_ms": round(float(np.percentile(lat, 99)), 2),
+        "qps": round(len(texts) / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=3.0)
+    args = parser.parse_args()
+
+    model = SentenceTransformer(args.model)
+
+    def encode(texts):
+        return model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+    encode(["warmup"])
+    texts = queries(args.requests)
+
+    direct = run(lambda t: encode([t]), texts, args.concurrency)
+    print("direct ", direct)
+
+    batcher = EmbedBatcher(encode, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    batched = run(lambda t: batcher.encode([t]), texts, args.concurrency)
+    print("batched", batched, batcher.stats())
+
+
+if __name__ == "__main__":
+    main()
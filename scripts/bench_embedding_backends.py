@@ -0,0 +1,105 @@
+"""
+Accuracy / latency comparison of the embedding backends against fp32 torch.
+
+    python -m scripts.bench_embedding_backends --corpus 20000 --queries 500 --k 10
+
+Corpus = course section texts from the db (same text build_index embeds);
+queries = the first sentence of a random sample of other sections.
+For each backend it reports:
+  - single-query encode latency p50 / p99 and corpus encode throughput
+  - recall@k of its query vectors searched against the fp32 index
+  - recall@k when the corpus is re-encoded with the backend as well
+where recall@k = overlap of the top-k ids with the fp32 top-k.
+"""
+import argparse
+import os
+import time
+import numpy as np
+import faiss
+from dotenv import load_dotenv
+
+if os.getenv("ENV") != "PROD":
+    load_dotenv()
+
+from core.db import SessionLocal  # noqa: E402
+from models import CourseSection  # noqa: E402
+from utils.embedding_backend import BACKENDS, load_backend  # noqa: E402
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def load_texts(n_corpus, n_queries, seed=0):
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(CourseSection.description, CourseSection.learning_objectives)
+            .filter(CourseSection.description.isnot(None))
+            .limit(n_corpus + n_queries)
+            .all()
+        )
+    finally:
+        db.close()
+    texts = [f"{(d or '').strip()} {(lo or '').strip()}".strip() for d, lo in rows if (d or "").strip()]
+    rng = np.random.default_rng(seed)
+    rng.shuffle(texts)
+    corpus = texts[:n_corpus]
+    queries = [t.split(".")[0][:200] for t in texts[n_corpus:n_corpus + n_queries]]
+    return corpus, queries
+
+
+def flat_index(emb):
+    index = faiss.IndexFlatIP(emb.shape[1])
+    index.add(emb)
+    return index
+
+
+def recall(ref_ids, ids, k):
+    return float(np.mean([len(set(a[:k]) & set(b[:k])) / k for a, b in zip(ref_ids, ids)]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    args = parser.parse_args()
+
+    corpus, queries = load_texts(args.corpus, args.queries)
+    print(f"corpus={len(corpus)} queries={len(queries)} k={args.k}")
+
+    ref = load_backend("torch", MODEL_NAME)
+    ref_corpus = ref.encode(corpus)
+    ref_index = flat_index(ref_corpus)
+    _, ref_ids = ref_index.search(ref.encode(queries), args.k)
+
+    for name in args.backends.split(","):
+        backend = load_backend(name, MODEL_NAME)
+        backend.encode(["warmup"])
+
+        lat = []
+        for q in queries:
+            start = time.perf_counter()
+            backend.encode([q])
+            lat.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        corpus_emb = backend.encode(corpus)
+        corpus_tps = len(corpus) / (time.perf_counter() - start)
+
+        q_emb = backend.encode(queries)
+        _, ids_query_only = ref_index.search(q_emb, args.k)
+        _, ids_full = flat_index(corpus_emb).search(q_emb, args.k)
+
+        print({
+            "backend": name,
+            "query_p50_ms": round(float(np.percentile(lat, 50)), 2),
+            "query_p99_ms": round(float(np.percentile(lat, 99)), 2),
+            "corpus_texts_per_sec": round(corpus_tps, 1),
+            f"recall@{args.k}_vs_fp32_index": round(recall(ref_ids, ids_query_only, args.k), 4),
+            f"recall@{args.k}_reencoded": round(recall(ref_ids, ids_full, args.k), 4),
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Professor metadata: pickled np.save list of dicts (the old format) vs the
+memory-mapped column file (utils/columnar.py) the search route loads now.
+
+    python -m scripts.bench_prof_metadata                      # professors from the db
+    python -m scripts.bench_prof_metadata --synthetic 200000   # generated rows, no db needed
+
+Each format is loaded in a fresh interpreter and reports file size, load time,
+RSS growth after load, and the latency of --lookups random id -> row reads.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import numpy as np
+from dotenv import load_dotenv
+
+if os.getenv("ENV") != "PROD":
+    load_dotenv()
+
+from routes.vector_search import prof_record, prof_store  # noqa: E402  (core.db needs env loaded)
+
+LOAD = {
+    "pickle": """
+rows = np.load(PATH, allow_pickle=True).tolist()
+store = {p["professor_id"]: p for p in rows}
+lookup = store.get
+""",
+    "columnar": """
+from utils.columnar import ColumnStore
+store = ColumnStore.open(PATH)
+lookup = store.get
+""",
+}
+
+TEMPLATE = """
+import random, time
+import numpy as np
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+PATH = {path!r}
+base = rss_kb()
+start = time.perf_counter()
+{load}
+load_s = time.perf_counter() - start
+rss = rss_kb() - base
+
+ids = {ids!r}
+start = time.perf_counter()
+for i in ids:
+    lookup(i)
+lookup_us = (time.perf_counter() - start) / len(ids) * 1e6
+print(load_s, rss, lookup_us)
+"""
+
+
+def synthetic(n, seed=0):
+    rng = random.Random(seed)
+    words = "data systems learning theory applied methods analysis design history policy".split()
+    out = []
+    for pid in range(1, n + 1):
+        bio = " ".join(rng.choice(words) for _ in range(rng.randint(20, 120)))
+        emails = [f"prof{pid}@example.edu"] if rng.random() < 0.8 else []
+        out.append({
+            "professor_id": pid,
+            "name": f"Professor {pid}",
+            "title": rng.choice(["Professor", "Associate Professor", "Lecturer", None]),
+            "emails": emails,
+            "primary_email": emails[0] if emails else None,
+            "bio": bio,
+            "department_id": rng.randint(1, 5000),
+            "college_id": rng.randint(1, 400),
+        })
+    return out
+
+
+def from_db():
+    from core.db import SessionLocal
+    from models import Professor
+
+    db = SessionLocal()
+    try:
+        return [prof_record(p) for p in db.query(Professor).yield_per(5000)]
+    finally:
+        db.close()
+
+
+def measure(fmt, path, ids):
+    code = TEMPLATE.format(path=path, load=LOAD[fmt], ids=ids)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=os.getcwd())
+    if out.returncode:
+        print(out.stderr)
+        return None
+    load_s, rss, lookup_us = out.stdout.split()
+    return float(load_s), int(rss), float(lookup_us)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--synthetic", type=int, help="generate this many rows instead of reading the db")
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args()
+
+    rows = synthetic(args.synthetic) if args.synthetic else from_db()
+    rng = random.Random(1)
+    ids = [rng.choice(rows)["professor_id"] for _ in range(args.lookups)]
+    print(f"{len(rows)} professors")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {
+            "pickle": os.path.join(tmp, "prof_vector_cache.npy"),
+            "columnar": os.path.join(tmp, "professors.col"),
+        }
+        np.save(paths["pickle"], rows, allow_pickle=True)
+        prof_store(rows).write(paths["columnar"])
+
+        for fmt, path in paths.items():
+            res = measure(fmt, path, ids)
+            size_mb = os.path.getsize(path) / 1e6
+            if res is None:
+                print(f"{fmt:10s} failed")
+                continue
+            load_s, rss, lookup_us = res
+            print(
+                f"{fmt:10s} file {size_mb:8.1f} MB  load {load_s:7.3f}s  "
+                f"rss +{rss / 1024:8.1f} MB  lookup {lookup_us:6.2f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
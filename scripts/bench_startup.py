@@ -0,0 +1,65 @@
+"""
+Cold-start cost per component, each measured in a fresh interpreter.
+
+    python -m scripts.bench_startup --repeat 5
+
+Run it on two commits to compare before / after. "import main" needs the DB_*
+env vars (or a .env) because core.db reads them at import; it doesn't connect.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+STEPS = {
+    "import numpy": "import numpy",
+    "import faiss": "import faiss",
+    "import torch": "import torch",
+    "import sentence_transformers": "import sentence_transformers",
+    "import routes.vector_search": "from dotenv import load_dotenv; load_dotenv(); import routes.vector_search",
+    "import main": "from dotenv import load_dotenv; load_dotenv(); import main",
+    "load model (torch)": (
+        "from utils.embedding_backend import load_backend; "
+        "load_backend('torch', 'sentence-transformers/all-MiniLM-L6-v2')"
+    ),
+    "load model + first encode": (
+        "from utils.embedding_backend import load_backend; "
+        "b = load_backend('torch', 'sentence-transformers/all-MiniLM-L6-v2'); b.encode(['warm up'])"
+    ),
+}
+
+TEMPLATE = """
+import time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(code):
+    out = subprocess.run(
+        [sys.executable, "-c", TEMPLATE.format(code=code)],
+        capture_output=True,
+        text=True,
+    )
+    if out.returncode:
+        return None
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for name, code in STEPS.items():
+        runs = [measure(code) for _ in range(args.repeat)]
+        runs = [r for r in runs if r is not None]
+        if not runs:
+            print(f"{name:32s} failed")
+            continue
+        print(f"{name:32s} median {statistics.median(runs):7.3f}s  min {min(runs):7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Build the vector search artifacts out of process and publish them atomically.
+
+    python -m scripts.build_index                     # full rebuild of both indexes
+    python -m scripts.build_index --incremental       # only rows changed since the last build
+    python -m scripts.build_index --only sections
+    python -m scripts.build_index --workers 32        # encode on a 32-process pool
+
+Both indexes are written into one new version directory under VECTOR_ARTIFACT_DIR
+and made live by replacing the CURRENT manifest. Running API workers pick the new
+version up within VECTOR_RELOAD_CHECK_SECONDS (or immediately via POST /vector_search/reload).
+"""
+import argparse
+import os
+import time
+from dotenv import load_dotenv
+
+if os.getenv("ENV") != "PROD":
+    load_dotenv()
+
+from core.db import BulkSessionLocal  # noqa: E402  (needs env loaded)
+from routes import vector_search as vs  # noqa: E402
+from utils import artifacts  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", choices=["sections", "professors"])
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--workers", type=int, help="encoding processes (default INDEX_ENCODE_WORKERS)")
+    parser.add_argument("--encode-chunk", type=int, help="texts per pool task (default INDEX_ENCODE_CHUNK)")
+    parser.add_argument("--build-chunk", type=int, help="minimum rows per build step (default INDEX_BUILD_CHUNK)")
+    args = parser.parse_args()
+
+    if args.encode_chunk:
+        vs.INDEX_ENCODE_CHUNK = args.encode_chunk
+    if args.build_chunk:
+        vs.INDEX_BUILD_CHUNK = args.build_chunk
+
+    db = BulkSessionLocal()
+    try:
+        report = {}
+        if args.only != "professors":
+            start = time.perf_counter()
+            if args.incremental:
+                report["sections"] = vs.sync_index(db, persist=False)
+            else:
+                vs.build_index(db, persist=False, workers=args.workers)
+                report["sections"] = {"mode": "rebuild", **(vs.index_meta or {}).get("encode", {})}
+            report["sections"]["seconds"] = round(time.perf_counter() - start, 1)
+
+        if args.only != "sections":
+            start = time.perf_counter()
+            if args.incremental:
+                report["professors"] = vs.sync_prof_index(db, persist=False)
+            else:
+                vs.build_prof_index(db, persist=False, workers=args.workers)
+                report["professors"] = {"mode": "rebuild", **(vs.prof_index_meta or {}).get("encode", {})}
+            report["professors"]["seconds"] = round(time.perf_counter() - start, 1)
+
+        with artifacts.publish() as stage:
+            if args.only != "professors" and vs.index is not None:
+                vs.save_cache(stage)
+            if args.only != "sections" and vs.prof_index is not None:
+                vs.save_prof_cache(stage)
+
+        report["version"] = artifacts.current_version()
+        print(report)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from utils import ann_index
+
+
+def unit(x):
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+def cfg(kind):
+    return {
+        "index_type": kind,
+        "nlist": 8,
+        "pq_m": 8,
+        "hnsw_m": 16,
+        "ef_construction": 40,
+        "nprobe": 8,
+        "ef_search": 64,
+        "mmap": False,
+    }
+
+
+@pytest.mark.parametrize("kind", ["flat", "ivf_flat", "hnsw"])
+def test_sync_keeps_labels(kind):
+    rng = np.random.default_rng(0)
+    n, dim = 2000, 32
+    ids = np.arange(n, dtype=np.int64) * 10 + 7  # labels unlike positions
+    vectors = unit(rng.standard_normal((n, dim)))
+    index, meta = ann_index.make_index(vectors, ids, cfg(kind))
+    assert meta["index_type"] == kind
+
+    # a sync: delete some rows, replace others (remove + add with new vectors)
+    deleted = ids[:100]
+    replaced = ids[500:600]
+    new_vectors = unit(rng.standard_normal((len(replaced), dim)))
+    index = ann_index.apply_changes(
+        index, meta, np.concatenate([deleted, replaced]), new_vectors, replaced
+    )
+
+    expected = {int(i): v for i, v in zip(ids[100:], vectors[100:])}
+    expected.update({int(i): v for i, v in zip(replaced, new_vectors)})
+    assert sorted(ann_index.index_ids(index).tolist()) == sorted(expected)
+
+    # every row's own vector finds its own label
+    probe = np.array(sorted(expected)[::37], dtype=np.int64)
+    scores, labels = ann_index.search(index, meta, cfg(kind), np.stack([expected[i] for i in probe]), 1, nprobe=8)
+    assert labels[:, 0].tolist() == probe.tolist()
+
+    # and a filtered search only returns the allowed labels
+    allowed = probe[:5]
+    _, labels = ann_index.search(index, meta, cfg(kind), np.stack([expected[i] for i in allowed]), 3, nprobe=8, ids=allowed)
+    assert set(labels[labels >= 0].tolist()) <= set(allowed.tolist())
+    assert labels[:, 0].tolist() == allowed.tolist()
+
+
+@pytest.mark.parametrize("kind", ["flat", "ivf_flat", "hnsw"])
+def test_search_after_reload(kind, tmp_path):
+    # the path a worker takes: read the published file, then search with per-request params
+    rng = np.random.default_rng(1)
+    n, dim = 2000, 32
+    ids = np.arange(n, dtype=np.int64) * 3 + 1
+    vectors = unit(rng.standard_normal((n, dim)))
+    index, meta = ann_index.make_index(vectors, ids, cfg(kind))
+    path = str(tmp_path / "index.faiss")
+    ann_index.write_index(index, meta, path)
+    index, meta = ann_index.read_index(path, cfg(kind))
+
+    probe = np.arange(0, n, 101)
+    _, labels = ann_index.search(index, meta, cfg(kind), vectors[probe], 5, ef_search=32)
+    assert labels[:, 0].tolist() == ids[probe].tolist()
+
+    _, labels = ann_index.search(index, meta, cfg(kind), vectors[probe], 5, ids=np.array([], dtype=np.int64))
+    assert (labels == -1).all()
@@ -0,0 +1,360 @@
+import json
+import os
+import tempfile
+import numpy as np
+
+# faiss is imported inside the functions that need it so importing this module
+# (and the routes that use it) stays cheap for processes that never search.
+
+# Index factory for the section / professor vector indexes.
+# Every index uses inner product on normalized embeddings (= cosine) and faiss labels
+# are the row's primary key (section_id / professor_id). Flat and HNSW are wrapped in
+# IndexIDMap2 for that (and searched through the wrapped index, see search()); IVF
+# stores labels in its inverted lists itself. IDMap2 can't wrap IVF: its remove_ids
+# compacts id_map assuming the inner index renumbers after a removal, which IVF
+# doesn't, so labels would drift on the first sync.
+#
+#   flat      exact brute force scan
+#   ivf_flat  inverted lists over full vectors, tune with nprobe
+#   ivf_pq    inverted lists over product-quantized vectors, smallest memory, tune with nprobe
+#   hnsw      graph index, tune with ef_search
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# bump when the on-disk layout changes; older files are rebuilt on load
+FORMAT_VERSION = 3
+
+IVF_TYPES = ("ivf_flat", "ivf_pq")
+
+# below these sizes training is meaningless and we fall back to an exact index
+MIN_IVF_ROWS = 1000
+MIN_PQ_ROWS = 10000
+MAX_TRAIN_ROWS = 100_000
+
+
+def index_config(prefix: str):
+    """
+    Read index settings from env, e.g. VECTOR_INDEX_TYPE / PROF_INDEX_TYPE.
+    Unset per-prefix values fall back to the VECTOR_* ones.
+    """
+    def get(name, default):
+        return os.getenv(f"{prefix}_{name}", os.getenv(f"VECTOR_{name}", default))
+
+    kind = get("INDEX_TYPE", "flat").lower()
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"unknown index type {kind!r}, expected one of {INDEX_TYPES}")
+
+    return {
+        "index_type": kind,
+        "nlist": int(get("IVF_NLIST", "0")),  # 0 = pick from row count
+        "pq_m": int(get("PQ_M", "16")),
+        "hnsw_m": int(get("HNSW_M", "32")),
+        "ef_construction": int(get("HNSW_EF_CONSTRUCTION", "80")),
+        "nprobe": int(get("IVF_NPROBE", "16")),
+        "ef_search": int(get("HNSW_EF_SEARCH", "64")),
+        "mmap": get("MMAP", "1") == "1",  # see read_index
+    }
+
+
+def resolve_type(kind: str, n: int) -> str:
+    if kind in IVF_TYPES and n < MIN_IVF_ROWS:
+        return "flat"
+    if kind == "ivf_pq" and n < MIN_PQ_ROWS:
+        return "ivf_flat"
+    return kind
+
+
+def factory_string(kind: str, dim: int, n: int, cfg: dict) -> str:
+    if kind == "flat":
+        return "IDMap2,Flat"
+    if kind == "hnsw":
+        return f"IDMap2,HNSW{cfg['hnsw_m']},Flat"
+
+    # ~39 training points per centroid is the faiss minimum, 4*sqrt(n) the usual target
+    nlist = cfg["nlist"] or int(4 * np.sqrt(n))
+    nlist = max(1, min(nlist, n // 39))
+    if kind == "ivf_flat":
+        return f"IVF{nlist},Flat"
+
+    pq_m = cfg["pq_m"]
+    if dim % pq_m:
+        raise ValueError(f"PQ_M={pq_m} must divide embedding dim {dim}")
+    return f"IVF{nlist},PQ{pq_m}"
+
+
+class IndexBuilder:
+    """
+    Streaming build: feed (embeddings, ids) chunks with add(), then finish().
+    n_estimate (an upper bound on the row count) picks the index type up front.
+
+    Untrained types (flat, hnsw) add each chunk as it arrives. Trained types (IVF)
+    can't add before training, and training has to see the whole table, not its
+    first rows in primary-key order. So chunks are spilled to a temp file while a
+    reservoir sample of MAX_TRAIN_ROWS is kept across the whole stream. finish()
+    trains on the sample, then replays the spill into the index. Memory is bounded
+    by the sample; the spill costs n * dim * 4 bytes of disk.
+    """
+
+    def __init__(self, cfg: dict, dim: int, n_estimate: int):
+        self.cfg = cfg
+        self.dim = dim
+        self.kind = resolve_type(cfg["index_type"], n_estimate)
+        self.spec = factory_string(self.kind, dim, n_estimate, cfg)
+        self.index = self._new_index(self.kind, self.spec)
+        self.rng = np.random.default_rng(0)
+        self.sample = np.zeros((0, dim), dtype=np.float32)
+        self.seen = 0
+        self.spill = None
+        self.spill_chunks = []  # rows per spilled chunk, in order
+
+    def _new_index(self, kind, spec):
+        import faiss
+
+        index = faiss.index_factory(self.dim, spec, faiss.METRIC_INNER_PRODUCT)
+        if kind == "hnsw":
+            faiss.downcast_index(index.index).hnsw.efConstruction = self.cfg["ef_construction"]
+        return index
+
+    def add(self, embeddings: np.ndarray, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if self.index.is_trained:
+            self.index.add_with_ids(embeddings, ids)
+            return
+        self._sample(embeddings)
+        if self.spill is None:
+            self.spill = tempfile.TemporaryFile()
+        self.spill.write(ids.tobytes())
+        self.spill.write(embeddings.tobytes())
+        self.spill_chunks.append(len(ids))
+
+    def _sample(self, embeddings):
+        """Reservoir sampling (algorithm R), vectorised per chunk."""
+        m = len(embeddings)
+        fill = max(0, min(m, MAX_TRAIN_ROWS - len(self.sample)))
+        if fill:
+            self.sample = np.concatenate([self.sample, embeddings[:fill]])
+        if fill < m:
+            # row at stream position t replaces a random slot with probability MAX_TRAIN_ROWS / (t + 1)
+            positions = np.arange(self.seen + fill, self.seen + m)
+            slots = self.rng.integers(0, positions + 1)
+            hit = np.flatnonzero(slots < MAX_TRAIN_ROWS)
+            # a slot drawn twice in one chunk keeps the later row, as the sequential algorithm would
+            rev = hit[::-1]
+            _, last = np.unique(slots[rev], return_index=True)
+            hit = rev[last]
+            self.sample[slots[hit]] = embeddings[fill + hit]
+        self.seen += m
+
+    def _train_and_replay(self):
+        n = self.seen
+        if resolve_type(self.kind, n) != self.kind:
+            # fewer usable rows than the estimate promised; start over with a type that fits
+            self.kind = resolve_type(self.kind, n)
+            self.spec = factory_string(self.kind, self.dim, n, self.cfg)
+            self.index = self._new_index(self.kind, self.spec)
+        if not self.index.is_trained:
+            self.index.train(self.sample)
+        self.sample = None
+
+        self.spill.seek(0)
+        for rows in self.spill_chunks:
+            ids = np.frombuffer(self.spill.read(rows * 8), dtype=np.int64)
+            embeddings = np.frombuffer(self.spill.read(rows * self.dim * 4), dtype=np.float32).reshape(rows, self.dim)
+            self.index.add_with_ids(embeddings, ids)
+        self.spill.close()
+        self.spill, self.spill_chunks = None, []
+
+    def finish(self):
+        """Returns (index, meta) where meta is what gets persisted next to the .faiss file."""
+        if self.spill is not None:
+            self._train_and_replay()
+        meta = {
+            "format": FORMAT_VERSION,
+            "index_type": self.kind,
+            "requested_type": self.cfg["index_type"],
+            "factory": self.spec,
+            "dim": self.dim,
+            "ntotal": int(self.index.ntotal),
+        }
+        return self.index, meta
+
+
+def make_index(embeddings: np.ndarray, ids, cfg: dict):
+    """Build, train and fill an index for an in-memory embedding matrix, labelled with ids."""
+    builder = IndexBuilder(cfg, embeddings.shape[1], len(embeddings))
+    builder.add(embeddings, ids)
+    return builder.finish()
+
+
+def search_params(meta: dict, cfg: dict, nprobe: int | None = None, ef_search: int | None = None, sel=None):
+    """Per-request search parameters; None for unfiltered exact indexes."""
+    import faiss
+
+    kind = meta.get("index_type", "flat")
+    if kind in IVF_TYPES:
+        return faiss.SearchParametersIVF(nprobe=nprobe or cfg["nprobe"], sel=sel)
+    if kind == "hnsw":
+        return faiss.SearchParametersHNSW(efSearch=ef_search or cfg["ef_search"], sel=sel)
+    if sel is not None:
+        return faiss.SearchParameters(sel=sel)
+    return None
+
+
+def search(index, meta: dict, cfg: dict, queries: np.ndarray, k: int, nprobe=None, ef_search=None, ids=None):
+    """
+    ids restricts the search to those labels (a filter). It's applied inside faiss
+    through an id selector, so a filtered query still gets up to k matching hits
+    instead of the global top k thinned after the fact.
+
+    faiss 1.7.4's IndexIDMap rejects search parameters (selector, efSearch), so
+    flat / hnsw are searched through the wrapped index: the filter is translated
+    from labels to positions first and the resulting positions back to labels.
+    IVF stores labels itself and takes the parameters directly.
+    """
+    import faiss
+
+    def empty():
+        return (
+            np.zeros((len(queries), k), dtype=np.float32),
+            np.full((len(queries), k), -1, dtype=np.int64),
+        )
+
+    id_map = None
+    if hasattr(index, "id_map"):
+        if not index.ntotal:
+            return empty()
+        # view of the labels by position, valid while index is alive
+        id_map = faiss.rev_swig_ptr(index.id_map.data(), index.id_map.size())
+
+    sel = None
+    if ids is not None:
+        ids = np.ascontiguousarray(ids, dtype=np.int64)
+        if id_map is not None:
+            ids = np.flatnonzero(np.isin(id_map, ids)).astype(np.int64)
+        if not len(ids):
+            return empty()
+        sel = faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids))
+        if meta.get("index_type") == "hnsw":
+            # the graph walk drops non-matching nodes, so give it room to find k that match
+            ef_search = max(ef_search or cfg["ef_search"], k)
+
+    params = search_params(meta, cfg, nprobe, ef_search, sel)
+    target = faiss.downcast_index(index.index) if id_map is not None else index
+    if params is None:
+        scores, found = target.search(queries, k)
+    else:
+        scores, found = target.search(queries, k, params=params)
+    if id_map is not None:
+        found = np.where(found >= 0, id_map[np.maximum(found, 0)], -1)
+    return scores, found
+
+
+def index_ids(index) -> np.ndarray:
+    """Labels currently stored in the index (id_map for IDMap2, the inverted lists for IVF)."""
+    import faiss
+
+    if hasattr(index, "id_map"):
+        return faiss.vector_to_array(index.id_map).astype(np.int64)
+    invlists = faiss.extract_index_ivf(index).invlists
+    parts = []
+    for l in range(invlists.nlist):
+        size = invlists.list_size(l)
+        if size:
+            ids = invlists.get_ids(l)
+            parts.append(np.array(faiss.rev_swig_ptr(ids, size), dtype=np.int64))
+            invlists.release_ids(l, ids)
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+
+def apply_changes(index, meta: dict, remove_ids, embeddings: np.ndarray | None, add_ids, index_path=None):
+    """
+    Remove then (re)add labelled vectors. Replacing a row = removing and adding its id.
+    Works on a copy and returns it, so searches on the live index are never racing a
+    mutation. IVF removes by label from its inverted lists. HNSW can't delete, so for it the surviving vectors are reconstructed
+    into a new graph (no re-encoding needed).
+    Memory-mapped indexes can't be cloned; for those index_path (the file the index
+    was read from) is required and the copy is read from it instead.
+    """
+    import faiss
+
+    remove_ids = np.asarray(sorted(set(remove_ids)), dtype=np.int64)
+
+    copied = False
+    if meta.get("mmap"):
+        if index_path is None:
+            raise ValueError("index_path is required to modify a memory-mapped index")
+        index = faiss.read_index(index_path)
+        copied = True
+    meta["mmap"] = False
+
+    if len(remove_ids) and meta["index_type"] == "hnsw":
+        labels = index_ids(index)
+        keep = ~np.isin(labels, remove_ids)
+        vectors = faiss.downcast_index(index.index).reconstruct_n(0, index.ntotal)
+        fresh = faiss.index_factory(index.d, meta["factory"], faiss.METRIC_INNER_PRODUCT)
+        faiss.downcast_index(fresh.index).hnsw.efConstruction = faiss.downcast_index(index.index).hnsw.efConstruction
+        fresh.add_with_ids(vectors[keep], labels[keep])
+        index = fresh
+    else:
+        if not copied:
+            index = faiss.clone_index(index)
+        if len(remove_ids):
+            index.remove_ids(remove_ids)
+
+    if embeddings is not None and len(embeddings):
+        index.add_with_ids(embeddings, np.asarray(add_ids, dtype=np.int64))
+
+    meta["ntotal"] = int(index.ntotal)
+    return index
+
+
+def meta_path(index_path: str) -> str:
+    return os.path.splitext(index_path)[0] + ".json"
+
+
+def write_index(index, meta: dict, index_path: str):
+    import faiss
+
+    meta = {k: v for k, v in meta.items() if k != "mmap"}
+
+    # the paths may be hard links into an older artifact version; never write through them
+    for path in (index_path, meta_path(index_path)):
+        if os.path.exists(path):
+            os.unlink(path)
+    faiss.write_index(index, index_path)
+    with open(meta_path(index_path), "w") as f:
+        json.dump(meta, f)
+
+
+def read_index(index_path: str, cfg: dict):
+    """
+    Open a persisted index. Returns (None, None) when the file is missing its sidecar,
+    uses an older layout or was built with a different requested type than the
+    current config, so the caller rebuilds.
+
+    With cfg["mmap"] IVF indexes are opened read-only with their inverted lists
+    memory-mapped, so every worker serving the same artifact shares one copy through
+    the page cache. faiss 1.7.4 only maps inverted lists; flat and hnsw indexes are
+    still read into each process (meta["mmap"] says which one you got).
+    """
+    import faiss
+
+    path = meta_path(index_path)
+    if not os.path.exists(path):
+        return None, None
+    with open(path) as f:
+        meta = json.load(f)
+
+    if meta.get("format") != FORMAT_VERSION or meta.get("requested_type") != cfg["index_type"]:
+        return None, None
+
+    mmap = cfg.get("mmap") and meta.get("index_type") in IVF_TYPES
+    if mmap:
+        index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    else:
+        index = faiss.read_index(index_path)
+    meta["mmap"] = bool(mmap)
+    meta["ntotal"] = int(index.ntotal)
+    meta["dim"] = int(index.d)
+    return index, meta
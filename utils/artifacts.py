@@ -0,0 +1,162 @@
+import fcntl
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+# Versioned vector search artifacts.
+#
+#   <root>/<version>/...   one immutable directory per publish
+#   <root>/CURRENT         json manifest naming the live version, replaced atomically
+#
+# Writers stage a new directory (pre-filled with hard links to the live files they
+# don't replace), rename it into place and then flip CURRENT with os.replace.
+# Readers only ever open files through CURRENT, so they never see a partial write.
+# Writers (publish, prune) hold an flock on <root>/.lock across stage, flip and
+# prune: a publisher has to link from the CURRENT left by the one before it, or
+# its flip drops that publisher's files, and prune must not delete the live
+# directory while another process is linking from it.
+
+ROOT = os.getenv("VECTOR_ARTIFACT_DIR", "./.cache/vector")
+KEEP_VERSIONS = int(os.getenv("VECTOR_ARTIFACT_KEEP", "3"))
+
+MANIFEST = "CURRENT"
+LOCK = ".lock"
+
+
+def manifest_path():
+    return os.path.join(ROOT, MANIFEST)
+
+
+def read_manifest():
+    try:
+        with open(manifest_path()) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+_last_check = 0.0
+_last_version = None
+
+
+def current_version(max_age: float = 0.0):
+    """Live version name or None. max_age > 0 reuses the last read for that many seconds."""
+    global _last_check, _last_version
+    now = time.monotonic()
+    if max_age and now - _last_check < max_age:
+        return _last_version
+    manifest = read_manifest()
+    _last_version = manifest["version"] if manifest else None
+    _last_check = now
+    return _last_version
+
+
+def file_id(name: str, max_age: float = 0.0):
+    """
+    Identity of a live file as (device, inode), or None. Files carried over between
+    versions are hard links, so the id only changes when the file was rewritten.
+    """
+    version = current_version(max_age)
+    if version is None:
+        return None
+    try:
+        st = os.stat(os.path.join(ROOT, version, name))
+    except FileNotFoundError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+def current_dir():
+    version = current_version()
+    return os.path.join(ROOT, version) if version else None
+
+
+def current_path(name: str):
+    """Path of a file in the live version, or None if there is no live version / file."""
+    d = current_dir()
+    if d is None:
+        return None
+    path = os.path.join(d, name)
+    return path if os.path.exists(path) else None
+
+
+@contextmanager
+def locked():
+    """Exclusive cross-process writer lock (blocks until held)."""
+    os.makedirs(ROOT, exist_ok=True)
+    with open(os.path.join(ROOT, LOCK), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class Stage:
+    def __init__(self, path: str):
+        self.dir = path
+
+    def path(self, name: str) -> str:
+        """Writable path for name; drops the hard link to the previous version's file first."""
+        path = os.path.join(self.dir, name)
+        if os.path.exists(path):
+            os.unlink(path)
+        return path
+
+
+@contextmanager
+def publish():
+    """
+    Stage a new version. Files not rewritten inside the block carry over from the
+    live version. On clean exit the version becomes live; on error it's discarded.
+    Holds the writer lock for the whole block, so concurrent publishers run one
+    after another, each on top of the previous one's version.
+    """
+    with locked():
+        staging = os.path.join(ROOT, f".stage-{uuid.uuid4().hex}")
+        os.makedirs(staging)
+
+        live = current_dir()
+        if live and os.path.isdir(live):
+            for name in os.listdir(live):
+                os.link(os.path.join(live, name), os.path.join(staging, name))
+
+        try:
+            yield Stage(staging)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        version = datetime.utcnow().strftime("%Y%m%dT%H%M%S") + f"-{uuid.uuid4().hex[:6]}"
+        final = os.path.join(ROOT, version)
+        os.rename(staging, final)
+
+        tmp = manifest_path() + f".{uuid.uuid4().hex}"
+        with open(tmp, "w") as f:
+            json.dump({"version": version, "created_at": datetime.utcnow().isoformat()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, manifest_path())
+
+        _prune(KEEP_VERSIONS)
+
+
+def prune(keep: int = KEEP_VERSIONS):
+    """Delete all but the newest `keep` versions (never the live one)."""
+    with locked():
+        _prune(keep)
+
+
+def _prune(keep: int):
+    live = current_version()
+    versions = sorted(
+        d for d in os.listdir(ROOT)
+        if not d.startswith(".") and d != MANIFEST and os.path.isdir(os.path.join(ROOT, d))
+    )
+    for d in versions[:-keep] if keep else versions:
+        if d != live:
+            shutil.rmtree(os.path.join(ROOT, d), ignore_errors=True)
@@ -0,0 +1,52 @@
+import threading
+import time
+
+# An in-memory index built from the database on first use. Routers that write the
+# underlying table either patch the loaded index in place with write() (name
+# indexes, which have upsert / remove) or call invalidate(); bulk loads always
+# invalidate. The ttl picks up writes made by other workers.
+
+
+class CachedIndex:
+    def __init__(self, build, ttl: float, row=None):
+        self.build = build  # build(db) -> index
+        self.row = row  # row(obj) -> (id, label[, text]) for write()
+        self.ttl = ttl
+        self.value = None
+        self.built_at = 0.0
+        self.lock = threading.Lock()
+
+    def get(self, db):
+        value = self.value
+        if value is not None and time.monotonic() - self.built_at < self.ttl:
+            return value
+        with self.lock:
+            # another request may have rebuilt it while we waited
+            if self.value is value:
+                self.value = self.build(db)
+                self.built_at = time.monotonic()
+            return self.value
+
+    def current(self):
+        """The loaded index (even if past its ttl), or None; for applying writes in place."""
+        return self.value
+
+    def write(self, obj=None, removed_id=None):
+        """Upsert obj (or remove removed_id) in the loaded index; nothing to do if it isn't loaded."""
+        value = self.value
+        if value is None:
+            return
+        if obj is not None:
+            value.upsert(*self.row(obj))
+        else:
+            value.remove(removed_id)
+
+    def invalidate(self):
+        self.value = None
+
+    def stats(self):
+        return {
+            "loaded": self.value is not None,
+            "age_seconds": round(time.monotonic() - self.built_at, 1) if self.value is not None else None,
+            "ttl_seconds": self.ttl,
+        }
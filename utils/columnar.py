@@ -0,0 +1,343 @@
+import heapq
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+
+# Fixed-layout column file for index metadata (one row per faiss label).
+#
+#   b"OCCOL1\n" | u64 header length | json header | 64-byte aligned arrays
+#
+# Int columns are plain typed arrays (with a null mask). String columns are an
+# int64 offsets array (n + 1) into one utf-8 blob plus a null mask; json columns
+# are string columns holding json.dumps of the value; cat columns are int32 codes
+# into a small vocabulary kept in the header (cheap to filter on with numpy).
+# Rows are sorted by id.
+# When the ids are dense enough (primary keys usually are) a row lookup array
+# indexed by id - min_id makes id -> row O(1); otherwise it's a binary search.
+# Opened with np.memmap the file is shared through the page cache by every
+# worker instead of being unpickled into per-process dicts.
+# write_arrays / read_arrays are the container on their own (magic, json header,
+# aligned 1-d arrays), also used for the BM25 index (utils/lexical_index.py).
+# ColumnWriter builds the same file from record chunks, spilling each column to
+# a temp file as it goes, for tables too big to hold as records.
+
+MAGIC = b"OCCOL1\n"
+ALIGN = 64
+KINDS = ("int", "str", "json", "cat")
+# build the O(1) lookup array while it costs at most this many slots per row
+DENSE_MAX_SPAN = 4
+
+
+def write_arrays(path: str, magic: bytes, header: dict, arrays: dict):
+    """magic | u64 header length | json header (+ array layout) | 64-byte aligned arrays."""
+    layout = {}
+    offset = 0
+    for name, arr in arrays.items():
+        offset = -(-offset // ALIGN) * ALIGN
+        layout[name] = {"dtype": arr.dtype.str, "offset": offset, "length": int(arr.shape[0])}
+        offset += arr.nbytes
+
+    encoded = json.dumps({**header, "arrays": layout}).encode()
+    base = -(-(len(magic) + 8 + len(encoded)) // ALIGN) * ALIGN
+
+    with open(path, "wb") as f:
+        f.write(magic)
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+        for name, arr in arrays.items():
+            f.seek(base + layout[name]["offset"])
+            arr.tofile(f) if isinstance(arr, Spill) else np.ascontiguousarray(arr).tofile(f)
+        f.truncate(base + offset)
+
+
+def read_arrays(path: str, magic: bytes):
+    """(header, {name: read-only memmap}) of a file written by write_arrays."""
+    with open(path, "rb") as f:
+        if f.read(len(magic)) != magic:
+            raise ValueError(f"{path} is not a {magic.strip().decode()} file")
+        header_len = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_len))
+    base = -(-(len(magic) + 8 + header_len) // ALIGN) * ALIGN
+
+    arrays = {}
+    for name, spec in header.pop("arrays").items():
+        if spec["length"] == 0:
+            arrays[name] = np.zeros(0, dtype=spec["dtype"])
+            continue
+        arrays[name] = np.memmap(
+            path, dtype=spec["dtype"], mode="r", offset=base + spec["offset"], shape=(spec["length"],)
+        )
+    return header, arrays
+
+
+class Spill:
+    """Append-only 1-d array in a temp file; write_arrays copies it over without loading it."""
+
+    def __init__(self, dtype):
+        self.dtype = np.dtype(dtype)
+        self.file = tempfile.TemporaryFile()
+        self.shape = (0,)
+
+    @property
+    def nbytes(self) -> int:
+        return self.shape[0] * self.dtype.itemsize
+
+    def append(self, arr):
+        arr = np.ascontiguousarray(arr, dtype=self.dtype)
+        self.file.write(arr.tobytes())
+        self.shape = (self.shape[0] + len(arr),)
+
+    def tofile(self, f):
+        self.file.seek(0)
+        shutil.copyfileobj(self.file, f, 1 << 20)
+
+    def close(self):
+        self.file.close()
+
+
+def row_lookup(ids: np.ndarray):
+    """id - min_id -> row array for sorted ids, or None when they're too sparse."""
+    n = len(ids)
+    if not n:
+        return None
+    span = int(ids[-1] - ids[0]) + 1
+    if span > DENSE_MAX_SPAN * n:
+        return None
+    rows = np.full(span, -1, dtype=np.int32 if n < 2**31 else np.int64)
+    rows[ids - ids[0]] = np.arange(n)
+    return rows
+
+
+def encode_columns(records: list, schema: dict, codes: dict) -> dict:
+    """
+    {array name: array} for the schema columns of records. Offsets start at 0;
+    cat values are coded through codes (column -> {value: code}), new values
+    get the next code.
+    """
+    n = len(records)
+    arrays = {}
+    for name, kind in schema.items():
+        values = [r.get(name) for r in records]
+        arrays[f"{name}.null"] = np.fromiter((v is None for v in values), dtype=np.uint8, count=n)
+        if kind == "int":
+            arrays[name] = np.fromiter((0 if v is None else v for v in values), dtype=np.int64, count=n)
+        elif kind == "cat":
+            col = codes.setdefault(name, {})
+            for v in values:
+                if v is not None and v not in col:
+                    col[v] = len(col)
+            arrays[name] = np.fromiter((col.get(v, 0) for v in values), dtype=np.int32, count=n)
+        elif kind in ("str", "json"):
+            text = json.dumps if kind == "json" else str
+            encoded = [b"" if v is None else text(v).encode() for v in values]
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.fromiter((len(b) for b in encoded), dtype=np.int64, count=n), out=offsets[1:])
+            arrays[f"{name}.offsets"] = offsets
+            arrays[f"{name}.blob"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        else:
+            raise ValueError(f"unknown column kind {kind!r}, expected one of {KINDS}")
+    return arrays
+
+
+class ColumnStore:
+    def __init__(self, id_field: str, schema: dict, arrays: dict, n: int, vocab: dict | None = None, mapped: bool = False):
+        self.id_field = id_field
+        self.schema = schema  # column name -> "int" | "str" | "json" | "cat"
+        self.arrays = arrays
+        self.vocab = vocab or {}  # cat column -> list of values, code = position
+        self.n = n
+        self.ids = arrays["__ids"]
+        self.lookup = arrays.get("__rows")
+        self.min_id = int(self.ids[0]) if n else 0
+        self.mapped = mapped  # backed by a file opened with open()
+
+    # ---------- build ----------
+
+    @classmethod
+    def from_records(cls, records, id_field: str, schema: dict):
+        """records: iterable of dicts with id_field plus every column in schema."""
+        records = sorted(records, key=lambda r: r[id_field])
+        n = len(records)
+        arrays = {"__ids": np.fromiter((r[id_field] for r in records), dtype=np.int64, count=n)}
+        rows = row_lookup(arrays["__ids"])
+        if rows is not None:
+            arrays["__rows"] = rows
+
+        # sorted vocabularies when every value is known up front
+        codes = {
+            name: {v: i for i, v in enumerate(sorted({r.get(name) for r in records} - {None}))}
+            for name, kind in schema.items() if kind == "cat"
+        }
+        arrays.update(encode_columns(records, schema, codes))
+        vocab = {name: list(col) for name, col in codes.items()}
+        return cls(id_field, schema, arrays, n, vocab)
+
+    def write(self, path: str):
+        header = {"id_field": self.id_field, "schema": self.schema, "n": self.n, "vocab": self.vocab}
+        write_arrays(path, MAGIC, header, self.arrays)
+
+    # ---------- read ----------
+
+    @classmethod
+    def open(cls, path: str):
+        header, arrays = read_arrays(path, MAGIC)
+        return cls(header["id_field"], header["schema"], arrays, header["n"], header.get("vocab"), mapped=True)
+
+    def position(self, id_) -> int:
+        """Row number of id, or -1."""
+        if self.lookup is not None:
+            off = int(id_) - self.min_id
+            return int(self.lookup[off]) if 0 <= off < len(self.lookup) else -1
+        pos = int(np.searchsorted(self.ids, id_))
+        if pos < self.n and self.ids[pos] == id_:
+            return pos
+        return -1
+
+    def value(self, pos: int, name: str):
+        if self.arrays[f"{name}.null"][pos]:
+            return None
+        if self.schema[name] == "int":
+            return int(self.arrays[name][pos])
+        if self.schema[name] == "cat":
+            return self.vocab[name][self.arrays[name][pos]]
+        offsets = self.arrays[f"{name}.offsets"]
+        text = bytes(self.arrays[f"{name}.blob"][offsets[pos]:offsets[pos + 1]]).decode()
+        return json.loads(text) if self.schema[name] == "json" else text
+
+    def column(self, name: str):
+        """(values, null mask) arrays for vectorized filtering; cat values are codes."""
+        return self.arrays[name], self.arrays[f"{name}.null"]
+
+    def code(self, name: str, value) -> int:
+        """Code of value in a cat column, -1 if it never occurs."""
+        try:
+            return self.vocab[name].index(value)
+        except ValueError:
+            return -1
+
+    def row(self, pos: int) -> dict:
+        out = {self.id_field: int(self.ids[pos])}
+        for name in self.schema:
+            out[name] = self.value(pos, name)
+        return out
+
+    def get(self, id_, default=None):
+        pos = self.position(id_)
+        return self.row(pos) if pos >= 0 else default
+
+    def __getitem__(self, id_):
+        pos = self.position(id_)
+        if pos < 0:
+            raise KeyError(id_)
+        return self.row(pos)
+
+    def __contains__(self, id_) -> bool:
+        return self.position(id_) >= 0
+
+    def __len__(self) -> int:
+        return self.n
+
+    def records(self):
+        for pos in range(self.n):
+            yield self.row(pos)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(arr.nbytes for arr in self.arrays.values())
+
+
+class ColumnWriter:
+    """
+    Streaming ColumnStore build: add() record chunks in ascending id order, then
+    finish(). Each chunk is encoded and appended to per-column temp files right
+    away, so memory holds the ids (for the row lookup) but not the records.
+    Cat vocabularies are in first-seen order rather than sorted.
+    """
+
+    def __init__(self, id_field: str, schema: dict):
+        self.id_field = id_field
+        self.schema = schema
+        self.ids = []  # int64 chunks
+        self.n = 0
+        self.codes = {}
+        self.blob_bytes = {}  # str / json column -> blob bytes written so far
+        self.spills = {}
+        for name, kind in schema.items():
+            self.spills[f"{name}.null"] = Spill(np.uint8)
+            if kind == "int":
+                self.spills[name] = Spill(np.int64)
+            elif kind == "cat":
+                self.spills[name] = Spill(np.int32)
+            elif kind in ("str", "json"):
+                self.spills[f"{name}.offsets"] = Spill(np.int64)
+                self.spills[f"{name}.offsets"].append(np.zeros(1, dtype=np.int64))
+                self.spills[f"{name}.blob"] = Spill(np.uint8)
+                self.blob_bytes[name] = 0
+            else:
+                raise ValueError(f"unknown column kind {kind!r}, expected one of {KINDS}")
+
+    def add(self, records):
+        records = sorted(records, key=lambda r: r[self.id_field])
+        if not records:
+            return
+        ids = np.fromiter((r[self.id_field] for r in records), dtype=np.int64, count=len(records))
+        if self.ids and ids[0] <= self.ids[-1][-1]:
+            raise ValueError("ColumnWriter.add needs chunks in ascending id order")
+        for name, arr in encode_columns(records, self.schema, self.codes).items():
+            if name.endswith(".offsets"):
+                col = name[:-len(".offsets")]
+                arr = arr[1:] + self.blob_bytes[col]
+                self.blob_bytes[col] = int(arr[-1])
+            self.spills[name].append(arr)
+        self.ids.append(ids)
+        self.n += len(ids)
+
+    def finish(self, path: str | None = None) -> ColumnStore:
+        """
+        Write the column file and return it opened (memory-mapped). Without a
+        path it goes to an unlinked temp file that lives as long as the mapping.
+        """
+        ids = np.concatenate(self.ids) if self.ids else np.zeros(0, dtype=np.int64)
+        arrays = {"__ids": ids}
+        rows = row_lookup(ids)
+        if rows is not None:
+            arrays["__rows"] = rows
+        arrays.update(self.spills)
+        vocab = {name: list(col) for name, col in self.codes.items()}
+        header = {"id_field": self.id_field, "schema": self.schema, "n": self.n, "vocab": vocab}
+
+        temp = path is None
+        if temp:
+            fd, path = tempfile.mkstemp(suffix=".col")
+            os.close(fd)
+        try:
+            write_arrays(path, MAGIC, header, arrays)
+            return ColumnStore.open(path)
+        finally:
+            if temp:
+                os.unlink(path)
+            for spill in self.spills.values():
+                spill.close()
+            self.ids, self.spills = [], {}
+
+
+def merge_stores(base: ColumnStore, updates: ColumnStore, drop_ids=(), chunk_size: int = 4096) -> ColumnStore:
+    """
+    base minus drop_ids, with the rows of updates added or replacing base's, as a
+    new (temp file backed) store. Both inputs are read row by row in id order and
+    written through a ColumnWriter, so neither is loaded whole.
+    """
+    drop = set(drop_ids)
+    key = base.id_field
+    kept = (r for r in base.records() if r[key] not in drop and r[key] not in updates)
+    writer = ColumnWriter(key, base.schema)
+    chunk = []
+    for r in heapq.merge(kept, updates.records(), key=lambda r: r[key]):
+        chunk.append(r)
+        if len(chunk) >= chunk_size:
+            writer.add(chunk)
+            chunk = []
+    writer.add(chunk)
+    return writer.finish()
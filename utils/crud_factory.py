@@ -1,15 +1,273 @@
-from fastapi import HTTPException
+import csv
+import io
+import json
+import os
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi import Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import inspect, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from core import deps
+from core.db import bulk_engine
 
 def get_db():
     from main import get_db as g
     return next(g())
 
+# list endpoints return at most CRUD_DEFAULT_LIMIT rows unless ?limit= asks for more (up to CRUD_MAX_LIMIT)
+DEFAULT_LIMIT = int(os.getenv("CRUD_DEFAULT_LIMIT", "100"))
+MAX_LIMIT = int(os.getenv("CRUD_MAX_LIMIT", "1000"))
+# rows fetched from the server-side cursor and written per chunk by export endpoints
+EXPORT_CHUNK = int(os.getenv("CRUD_EXPORT_CHUNK", "1000"))
+
+
+def page_limit(limit: int | None) -> int:
+    """?limit= clamped to [1, MAX_LIMIT], DEFAULT_LIMIT when unset."""
+    return max(1, min(limit or DEFAULT_LIMIT, MAX_LIMIT))
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# rows per INSERT (executemany) and per transaction in bulk endpoints
+BULK_BATCH = int(os.getenv("CRUD_BULK_BATCH", "500"))
+
+def json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=json_default)
+    return value
+
+def parse_rows(body: bytes, content_type: str):
+    """
+    ([(index, row)], errors) from a JSON array body, or NDJSON when the content type
+    says so. NDJSON lines that don't parse become per-row errors (index = line number).
+    """
+    if "ndjson" in content_type or "jsonl" in content_type:
+        rows, errors = [], []
+        for i, line in enumerate(body.splitlines()):
+            if not line.strip():
+                continue
+            try:
+                rows.append((i, json.loads(line)))
+            except ValueError as e:
+                errors.append({"index": i, "error": f"invalid JSON: {e}"})
+        return rows, errors
+    try:
+        data = json.loads(body or b"null")
+    except ValueError as e:
+        raise HTTPException(400, f"invalid JSON: {e}")
+    if not isinstance(data, list):
+        raise HTTPException(400, "expected a JSON array of rows (or NDJSON with Content-Type: application/x-ndjson)")
+    return list(enumerate(data)), []
+
+def db_error(e: SQLAlchemyError) -> str:
+    return str(getattr(e, "orig", None) or e)
+
 # creates basic CRUD routes for all sql models (from models.py)
 def make_crud(model):
+    mapper = inspect(model)
+    pk = mapper.primary_key[0]
+    columns = {c.key: getattr(model, c.key) for c in mapper.column_attrs}
+    table = model.__table__
+    pk_keys = {c.key for c in table.primary_key}
+    key_type = pk.type.python_type
+
     class CRUD:
-        def all(self, db: Session):
-            return db.query(model).all()
+        def columns(self, fields: str | None):
+            """Column attributes for a comma separated ?fields= list (primary key always included), None for whole rows."""
+            if not fields:
+                return None
+            names = [f.strip() for f in fields.split(",") if f.strip()]
+            unknown = [n for n in names if n not in columns]
+            if unknown:
+                raise HTTPException(400, f"unknown fields for {model.__name__}: {', '.join(unknown)}")
+            if pk.key not in names:
+                names.insert(0, pk.key)
+            return [columns[n] for n in names]
+
+        def all(self, db: Session, after_id=None, limit: int | None = None, fields: str | None = None, query=None, offset: int = 0):
+            """
+            One page of rows ordered by primary key. Keyset pagination: pass the last
+            row's id as after_id to get the next page. `query` narrows the rows (filters
+            only, no limit / order). With `fields` only those columns are selected and
+            rows come back as dicts. offset is for older clients, ignored with after_id.
+            """
+            q = query if query is not None else db.query(model)
+            cols = self.columns(fields)
+            if cols:
+                q = q.with_entities(*cols)
+            if after_id is not None:
+                q = q.filter(pk > after_id)
+            q = q.order_by(pk).limit(page_limit(limit))
+            if offset and after_id is None:
+                q = q.offset(offset)
+            rows = q.all()
+            return [dict(r._mapping) for r in rows] if cols else rows
+
+        def by_ids(self, db: Session, ids: list, fields: str | None = None):
+            """Rows for ids in the order given (e.g. search ranking); ids that don't exist are skipped."""
+            if not ids:
+                return []
+            cols = self.columns(fields)
+            rows = (db.query(*cols) if cols else db.query(model)).filter(pk.in_(ids)).all()
+            if cols:
+                found = {r._mapping[pk.key]: dict(r._mapping) for r in rows}
+            else:
+                found = {getattr(r, pk.key): r for r in rows}
+            return [found[i] for i in ids if i in found]
+
+        def export(self, format: str = "ndjson", fields: str | None = None, after_id=None):
+            """
+            Stream the whole table (from after_id on) as NDJSON or CSV. Rows come off a
+            server-side cursor EXPORT_CHUNK at a time and each chunk is written as soon
+            as it's read, so memory is flat and the first bytes go out right away.
+            Runs on its own connection from the bulk pool (core/db.py), so a long export
+            doesn't hold one of the interactive connections; the request's session is
+            closed before the body streams anyway.
+            """
+            if format not in EXPORT_FORMATS:
+                raise HTTPException(400, f"format must be one of {', '.join(EXPORT_FORMATS)}")
+            cols = self.columns(fields) or list(columns.values())
+            names = [c.key for c in cols]
+            stmt = select(*cols).order_by(pk)
+            if after_id is not None:
+                stmt = stmt.where(pk > after_id)
+
+            def partitions():
+                with bulk_engine.connect() as conn:
+                    result = conn.execution_options(stream_results=True, yield_per=EXPORT_CHUNK).execute(stmt)
+                    yield from result.partitions()
+
+            def ndjson():
+                for part in partitions():
+                    yield "".join(json.dumps(dict(zip(names, r)), default=json_default) + "\n" for r in part)
+
+            def csv_rows():
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                writer.writerow(names)
+                for part in partitions():
+                    writer.writerows([csv_value(v) for v in r] for r in part)
+                    yield buf.getvalue()
+                    buf.seek(0)
+                    buf.truncate()
+                if buf.tell():
+                    yield buf.getvalue()
+
+            table = model.__tablename__
+            return StreamingResponse(
+                ndjson() if format == "ndjson" else csv_rows(),
+                media_type=EXPORT_FORMATS[format],
+                headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+            )
+
+        def add_export_route(self, router):
+            """
+            GET /export on router, typed on this model's key. Call it before the
+            /{item_id} route is declared, or "export" is parsed as an id.
+            """
+            @router.get("/export")
+            def export(format: str = "ndjson", fields: str | None = None, after_id: key_type | None = None):
+                # streams the whole table; use for bulk pulls instead of paging through GET /
+                return self.export(format, fields, after_id)
+
+        def add_bulk_route(self, router, after_bulk=None):
+            """
+            POST /bulk on router. after_bulk() runs once the load is committed, for
+            routers that keep in-memory indexes over the table.
+            """
+            @router.post("/bulk")
+            async def bulk(request: Request, upsert: bool = False, db: Session = Depends(deps.get_db)):
+                # JSON array or NDJSON body; ?upsert=true updates rows whose key already exists
+                result = await self.bulk_request(request, db, upsert)
+                if after_bulk is not None:
+                    after_bulk()
+                return result
+
+        def _insert(self, db: Session, rows: list, upsert: bool):
+            # executemany needs one statement per key set
+            groups = {}
+            for row in rows:
+                groups.setdefault(tuple(sorted(row)), []).append(row)
+            for keys, params in groups.items():
+                stmt = mysql_insert(table)
+                if upsert:
+                    update = {k: stmt.inserted[k] for k in keys if k not in pk_keys}
+                    # python-side onupdate (updated_at) isn't applied to ON DUPLICATE KEY UPDATE
+                    for c in table.c:
+                        if c.onupdate is not None and c.key not in keys:
+                            update[c.key] = datetime.utcnow()
+                    if not update:
+                        update = {k: stmt.inserted[k] for k in keys}
+                    stmt = stmt.on_duplicate_key_update(update)
+                db.execute(stmt, params)
+
+        def bulk(self, db: Session, rows: list, upsert: bool = False, errors: list | None = None):
+            """
+            Insert (or with upsert, INSERT ... ON DUPLICATE KEY UPDATE) [(index, row)]
+            BULK_BATCH rows per executemany, one transaction per batch. A batch that
+            fails is retried row by row so one bad row only costs itself; its error is
+            reported by index and the rest of the batch is written. Throughput is
+            reported per call as rows_per_sec (written rows / wall time of the writes).
+            """
+            started = time.perf_counter()
+            errors = list(errors or [])
+            received = len(rows) + len(errors)
+            valid = []
+            for i, row in rows:
+                if not isinstance(row, dict):
+                    errors.append({"index": i, "error": "row must be a JSON object"})
+                    continue
+                unknown = [k for k in row if k not in table.c]
+                if unknown:
+                    errors.append({"index": i, "error": f"unknown fields for {model.__name__}: {', '.join(unknown)}"})
+                    continue
+                valid.append((i, row))
+
+            written = 0
+            for start in range(0, len(valid), BULK_BATCH):
+                batch = valid[start:start + BULK_BATCH]
+                try:
+                    with db.begin_nested():
+                        self._insert(db, [row for _, row in batch], upsert)
+                    written += len(batch)
+                except SQLAlchemyError:
+                    for i, row in batch:
+                        try:
+                            with db.begin_nested():
+                                self._insert(db, [row], upsert)
+                            written += 1
+                        except SQLAlchemyError as e:
+                            errors.append({"index": i, "error": db_error(e)})
+                db.commit()
+
+            elapsed = time.perf_counter() - started
+            return {
+                "received": received,
+                "written": written,
+                "failed": len(errors),
+                "errors": sorted(errors, key=lambda e: e["index"]),
+                "seconds": round(elapsed, 3),
+                "rows_per_sec": round(written / elapsed) if elapsed else written,
+            }
+
+        async def bulk_request(self, request, db: Session, upsert: bool = False):
+            """bulk() for a JSON array or NDJSON request body, run off the event loop."""
+            rows, errors = parse_rows(await request.body(), request.headers.get("content-type", ""))
+            return await run_in_threadpool(self.bulk, db, rows, upsert, errors)
 
         def get(self, db: Session, id: int):
             obj = db.query(model).get(id)
@@ -38,4 +296,20 @@ def make_crud(model):
             db.commit()
             return {"deleted": True}
 
-    return CRUD()
\ No newline at end of file
+    return CRUD()
+
+# async twin of a make_crud() object for AsyncSession routes. Each call runs the sync
+# method through AsyncSession.run_sync, so the queries (and keyset / fields handling)
+# are the same ones, but I/O waits on the async driver instead of holding a thread
+def make_async_crud(crud):
+    class AsyncCRUD:
+        async def all(self, db, *args, **kwargs):
+            return await db.run_sync(crud.all, *args, **kwargs)
+
+        async def by_ids(self, db, ids: list, fields: str | None = None):
+            return await db.run_sync(crud.by_ids, ids, fields)
+
+        async def get(self, db, id):
+            return await db.run_sync(crud.get, id)
+
+    return AsyncCRUD()
@@ -0,0 +1,72 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Micro-batching in front of model.encode.
+#
+# Search handlers run in Starlette's threadpool, so concurrent requests each
+# call encode with a batch of one. The batcher parks their texts on a queue; a
+# single worker thread drains up to max_batch texts (waiting at most max_wait_ms
+# after the first one arrives), encodes them in one call and hands each caller
+# its row back.
+
+
+class EmbedBatcher:
+    def __init__(self, encode, max_batch: int = 32, max_wait_ms: float = 3.0):
+        """encode: callable(list[str]) -> matrix with one row per text."""
+        self.encode_fn = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self.worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self.worker.start()
+
+    def encode(self, texts: list[str]):
+        """Blocking; returns rows in the same order as texts."""
+        futures = []
+        for text in texts:
+            fut = Future()
+            self.queue.put((text, fut))
+            futures.append(fut)
+        return [f.result() for f in futures]
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                vecs = self.encode_fn(texts)
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, fut), vec in zip(batch, vecs):
+                fut.set_result(vec)
+
+    def stats(self):
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch": self.items / self.batches if self.batches else None,
+            "queued": self.queue.qsize(),
+        }
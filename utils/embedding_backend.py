@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+import numpy as np
+
+# Pluggable sentence embedding backends. All of them return L2-normalized
+# float32 rows, so indexes built with one can be queried with another
+# (see scripts/bench_embedding_backends.py for how much recall that costs).
+#
+#   torch       sentence-transformers as-is, fp32
+#   torch_int8  same model with nn.Linear dynamically quantized to int8
+#   onnx        exported to ONNX, run with onnxruntime
+#   onnx_int8   the ONNX export with int8 dynamic quantization
+#
+# onnx backends need onnxruntime (onnx_int8 also needs onnx for quantization);
+# the export is cached under ONNX_CACHE_DIR.
+
+BACKENDS = ("torch", "torch_int8", "onnx", "onnx_int8")
+
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "./.cache/onnx")
+
+
+def normalize(emb: np.ndarray) -> np.ndarray:
+    emb = np.asarray(emb, dtype=np.float32)
+    return emb / np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12)
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: list[str], batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+
+
+class TorchInt8Backend(TorchBackend):
+    name = "torch_int8"
+
+    def __init__(self, model_name: str):
+        import torch
+
+        super().__init__(model_name)
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxBackend:
+    name = "onnx"
+    quantized = False
+
+    def __init__(self, model_name: str):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError(f"EMBED_BACKEND={self.name} needs onnxruntime installed") from e
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        path = self._export()
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dim = self.session.get_outputs()[0].shape[-1]
+        self.max_length = 256  # sentence-transformers max_seq_length for MiniLM
+
+    def _export(self) -> str:
+        """Export the transformer once per model; returns the .onnx path to load."""
+        out_dir = os.path.join(ONNX_CACHE_DIR, self.model_name.replace("/", "__"))
+        fp32 = os.path.join(out_dir, "model.onnx")
+        int8 = os.path.join(out_dir, "model_int8.onnx")
+
+        if not os.path.exists(fp32):
+            import torch
+            from transformers import AutoModel
+
+            os.makedirs(out_dir, exist_ok=True)
+            model = AutoModel.from_pretrained(self.model_name).eval()
+            dummy = self.tokenizer(["export"], return_tensors="pt")
+            names = list(dummy.keys())
+            axes = {n: {0: "batch", 1: "seq"} for n in names}
+            axes["last_hidden_state"] = {0: "batch", 1: "seq"}
+            tmp = fp32 + ".tmp"
+            with torch.no_grad():
+                torch.onnx.export(
+                    model,
+                    tuple(dummy[n] for n in names),
+                    tmp,
+                    input_names=names,
+                    output_names=["last_hidden_state"],
+                    dynamic_axes=axes,
+                    opset_version=14,
+                )
+            os.replace(tmp, fp32)
+
+        if not self.quantized:
+            return fp32
+
+        if not os.path.exists(int8):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            tmp = int8 + ".tmp"
+            quantize_dynamic(fp32, tmp, weight_type=QuantType.QInt8)
+            os.replace(tmp, int8)
+        return int8
+
+    def encode(self, texts: list[str], batch_size: int = 32) -> np.ndarray:
+        out = []
+        for i in range(0, len(texts), batch_size):
+            batch = self.tokenizer(
+                texts[i:i + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            feed = {k: v.astype(np.int64) for k, v in batch.items() if k in self.input_names}
+            hidden = self.session.run(None, feed)[0]
+            # mean pooling over real tokens, same as the sentence-transformers pooling layer
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            out.append((hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9))
+        if not out:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return normalize(np.concatenate(out))
+
+
+class OnnxInt8Backend(OnnxBackend):
+    name = "onnx_int8"
+    quantized = True
+
+
+def load_backend(name: str, model_name: str):
+    backends = {
+        "torch": TorchBackend,
+        "torch_int8": TorchInt8Backend,
+        "onnx": OnnxBackend,
+        "onnx_int8": OnnxInt8Backend,
+    }
+    if name not in backends:
+        raise ValueError(f"unknown embedding backend {name!r}, expected one of {BACKENDS}")
+    return backends[name](model_name)
+
+
+class LazyBackend:
+    """
+    Loads the backend (and with it torch / onnxruntime) on first use instead of at
+    import, so CRUD-only workers and health checks never pay for the model.
+    """
+
+    def __init__(self, name: str, model_name: str):
+        if name not in BACKENDS:
+            raise ValueError(f"unknown embedding backend {name!r}, expected one of {BACKENDS}")
+        self.name = name
+        self.model_name = model_name
+        self.backend = None
+        self.load_seconds = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        if self.backend is None:
+            with self.lock:
+                if self.backend is None:
+                    start = time.perf_counter()
+                    self.backend = load_backend(self.name, self.model_name)
+                    self.load_seconds = time.perf_counter() - start
+        return self.backend
+
+    @property
+    def loaded(self) -> bool:
+        return self.backend is not None
+
+    @property
+    def dim(self) -> int:
+        return self.get().dim
+
+    def encode(self, texts: list[str], batch_size: int = 32) -> np.ndarray:
+        return self.get().encode(texts, batch_size=batch_size)
@@ -0,0 +1,35 @@
+import math
+import numpy as np
+
+# Great-circle helpers for radius filters. Distances are in kilometres.
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_MILE = 1.609344
+# kilometres per unit accepted by distance query params
+UNITS = {"km": 1.0, "mi": KM_PER_MILE}
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """Distance from (lat, lng) to every point in lats / lngs (degrees)."""
+    lat1, lng1 = np.radians(lat), np.radians(lng)
+    lat2, lng2 = np.radians(np.asarray(lats, dtype=np.float64)), np.radians(np.asarray(lngs, dtype=np.float64))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    (min_lat, max_lat, min_lng, max_lng) containing every point within radius_km,
+    for a cheap indexed prefilter before the exact haversine check. Longitude
+    bounds are None when the box wraps the antimeridian or reaches a pole.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), None, None
+    # widest longitude span is at the box edge farthest from the equator
+    dlng = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(max(abs(min_lat), abs(max_lat))))))
+    min_lng, max_lng = lng - dlng, lng + dlng
+    if min_lng < -180 or max_lng > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lng, max_lng
@@ -0,0 +1,87 @@
+import numpy as np
+from utils.geo import EARTH_RADIUS_KM, bounding_box, haversine_km
+
+# In-memory index over point coordinates for radius and nearest-N queries.
+# Points are kept sorted by latitude, so a query only does haversine on the
+# latitude band of its bounding box (two searchsorted calls) narrowed by longitude.
+# A few thousand colleges answer in well under a millisecond; no MySQL scan.
+
+# farthest two points on earth can be apart
+MAX_DISTANCE_KM = np.pi * EARTH_RADIUS_KM
+# first search radius for nearest(); grows 4x until it holds n points
+NEAREST_START_KM = 50.0
+
+
+class GeoIndex:
+    def __init__(self, ids, lats, lngs):
+        ids = np.asarray(ids, dtype=np.int64)
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        # rows without coordinates can't match any distance query
+        ok = np.isfinite(lats) & np.isfinite(lngs)
+        order = np.argsort(lats[ok], kind="stable")
+        self.ids = ids[ok][order]
+        self.lats = lats[ok][order]
+        self.lngs = lngs[ok][order]
+
+    @classmethod
+    def from_rows(cls, rows):
+        """From (id, lat, lng) rows; None coordinates are skipped."""
+        rows = list(rows)
+        return cls(
+            [r[0] for r in rows],
+            [np.nan if r[1] is None else r[1] for r in rows],
+            [np.nan if r[2] is None else r[2] for r in rows],
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _window(self, lat, lng, radius_km):
+        """(positions, distances_km) of every point within radius_km, unsorted."""
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+        lo = int(np.searchsorted(self.lats, min_lat, side="left"))
+        hi = int(np.searchsorted(self.lats, max_lat, side="right"))
+        pos = np.arange(lo, hi)
+        if min_lng is not None:
+            lngs = self.lngs[lo:hi]
+            pos = pos[(lngs >= min_lng) & (lngs <= max_lng)]
+        dist = haversine_km(lat, lng, self.lats[pos], self.lngs[pos])
+        keep = dist <= radius_km
+        return pos[keep], dist[keep]
+
+    def _closest(self, pos, dist, limit):
+        if limit is not None and len(dist) > limit:
+            top = np.argpartition(dist, limit - 1)[:limit]
+            pos, dist = pos[top], dist[top]
+        order = np.argsort(dist, kind="stable")
+        return self.ids[pos[order]], dist[order]
+
+    def within(self, lat: float, lng: float, radius_km: float, limit: int | None = None):
+        """(ids, distances_km) within radius_km of (lat, lng), nearest first."""
+        if radius_km < 0 or not len(self.ids):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        pos, dist = self._window(lat, lng, radius_km)
+        return self._closest(pos, dist, limit)
+
+    def nearest(self, lat: float, lng: float, n: int, max_km: float | None = None):
+        """
+        (ids, distances_km) of the n points nearest (lat, lng), nearest first,
+        optionally no farther than max_km. Widens the search window until it
+        holds n points: once it does, nothing outside it can be closer.
+        """
+        if n <= 0 or not len(self.ids):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        limit_km = MAX_DISTANCE_KM if max_km is None else min(max_km, MAX_DISTANCE_KM)
+        radius = min(NEAREST_START_KM, limit_km)
+        while True:
+            pos, dist = self._window(lat, lng, radius)
+            if len(pos) >= n or radius >= limit_km:
+                return self._closest(pos, dist, n)
+            radius = min(radius * 4, limit_km)
+
+    def stats(self):
+        return {
+            "points": len(self.ids),
+            "bytes": int(self.ids.nbytes + self.lats.nbytes + self.lngs.nbytes),
+        }
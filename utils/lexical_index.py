@@ -0,0 +1,231 @@
+import math
+import re
+from collections import Counter
+import numpy as np
+
+from utils.columnar import read_arrays, write_arrays
+
+# BM25 inverted index for the things MiniLM embeddings match poorly: course codes
+# ("MATH 2413"), surnames, other exact tokens. Lives next to the faiss index with
+# the same labels and the same build / sync / publish lifecycle.
+#
+# Stored as CSR arrays: postings for term t are post_doc / post_tf[offsets[t]:offsets[t + 1]],
+# where post_doc is a row into doc_ids / doc_len. The vocabulary is term_offsets
+# into one utf-8 term_blob (position = term id) plus term_order, the term ids
+# sorted by term, so lookups are a binary search instead of a per-process dict.
+# Persisted in the aligned column file container (utils/columnar.py) and opened
+# with np.memmap, so every worker shares the pages instead of loading a copy.
+
+K1 = 1.2
+B = 0.75
+MAX_TOKEN_LEN = 40
+RRF_K = 60
+MAGIC = b"OCLEX1\n"
+
+TOKEN_RE = re.compile(r"[a-z]+|\d+")
+DIGIT_JOIN_RE = re.compile(r"(?<=\d)-(?=\d)")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercase letter runs and digit runs, so "MATH 2413", "math2413" and
+    "MATH-2413" all give ["math", "2413"]. Hyphens between digits are dropped
+    first so hyphenated numbers (ISBNs, phone numbers) stay one token.
+    """
+    if not text:
+        return []
+    text = DIGIT_JOIN_RE.sub("", text.lower())
+    return [t for t in TOKEN_RE.findall(text) if len(t) <= MAX_TOKEN_LEN]
+
+
+class LexicalIndex:
+    def __init__(self, arrays: dict, mapped: bool = False):
+        self.arrays = arrays
+        self.doc_ids = arrays["doc_ids"]
+        self.doc_len = arrays["doc_len"]
+        self.offsets = arrays["offsets"]
+        self.post_doc = arrays["post_doc"]
+        self.post_tf = arrays["post_tf"]
+        self.term_offsets = arrays["term_offsets"]
+        self.term_blob = arrays["term_blob"]
+        self.term_order = arrays["term_order"]
+        self.n_terms = len(self.term_order)
+        self.avg_len = float(self.doc_len.mean()) if len(self.doc_len) else 0.0
+        self.mapped = mapped  # backed by a file opened with open()
+
+    @classmethod
+    def from_terms(cls, terms, doc_ids, doc_len, offsets, post_doc, post_tf):
+        """terms: list[str], position = term id."""
+        encoded = [t.encode() for t in terms]
+        term_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded)), out=term_offsets[1:])
+        return cls({
+            "doc_ids": doc_ids,
+            "doc_len": doc_len,
+            "offsets": offsets,
+            "post_doc": post_doc,
+            "post_tf": post_tf,
+            "term_offsets": term_offsets,
+            "term_blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "term_order": np.asarray(sorted(range(len(encoded)), key=encoded.__getitem__), dtype=np.int32),
+        })
+
+    def _term(self, t) -> bytes:
+        return bytes(self.term_blob[self.term_offsets[t]:self.term_offsets[t + 1]])
+
+    def term_id(self, term: str):
+        """Term id of term, or None."""
+        key = term.encode()
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(self.term_order[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_terms and self._term(self.term_order[lo]) == key:
+            return int(self.term_order[lo])
+        return None
+
+    @property
+    def terms(self) -> list[str]:
+        """Whole vocabulary decoded, position = term id (for LexicalBuilder carry-over)."""
+        return [self._term(t).decode() for t in range(self.n_terms)]
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def search(self, query: str, k: int, ids=None):
+        """Top k (label, bm25 score) for query, best first. ids restricts the labels considered."""
+        n = len(self.doc_ids)
+        rows, contrib = [], []
+        for term in set(tokenize(query)):
+            t = self.term_id(term)
+            if t is None:
+                continue
+            start, end = self.offsets[t], self.offsets[t + 1]
+            df = end - start
+            if not df:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            docs = self.post_doc[start:end]
+            tf = self.post_tf[start:end].astype(np.float32)
+            norm = K1 * (1 - B + B * self.doc_len[docs] / self.avg_len)
+            rows.append(docs)
+            contrib.append(idf * tf * (K1 + 1) / (tf + norm))
+
+        if not rows or k <= 0:
+            return []
+        docs, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(contrib))
+        labels = self.doc_ids[docs]
+        if ids is not None:
+            keep = np.isin(labels, np.asarray(ids, dtype=np.int64))
+            labels, scores = labels[keep], scores[keep]
+
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(labels[i]), float(scores[i])) for i in top]
+
+    def stats(self):
+        return {
+            "docs": len(self.doc_ids),
+            "terms": self.n_terms,
+            "postings": int(len(self.post_doc)),
+            "bytes": int(sum(arr.nbytes for arr in self.arrays.values())),
+            "mapped": self.mapped,
+        }
+
+    def write(self, path: str):
+        write_arrays(path, MAGIC, {"docs": len(self.doc_ids), "terms": self.n_terms}, self.arrays)
+
+    @classmethod
+    def open(cls, path: str):
+        _, arrays = read_arrays(path, MAGIC)
+        return cls(arrays, mapped=True)
+
+
+class LexicalBuilder:
+    """
+    Streaming build, mirrors ann_index.IndexBuilder: add() chunks of (ids, texts),
+    then finish(). With base the documents of an existing index are carried over
+    minus remove_ids, which is how sync applies changes without re-reading every row.
+    """
+
+    def __init__(self, base: LexicalIndex | None = None, remove_ids=()):
+        self.terms = base.terms if base else []
+        self.term_ids = {t: i for i, t in enumerate(self.terms)}
+        self.doc_ids, self.doc_len = [], []
+        self.post_term, self.post_doc, self.post_tf = [], [], []
+        self.n_docs = 0
+        if base is not None:
+            self._carry_over(base, np.asarray(sorted(set(remove_ids)), dtype=np.int64))
+
+    def _carry_over(self, base: LexicalIndex, remove_ids):
+        keep = ~np.isin(base.doc_ids, remove_ids)
+        new_row = np.cumsum(keep) - 1
+        post_term = np.repeat(np.arange(base.n_terms, dtype=np.int32), np.diff(base.offsets))
+        live = keep[base.post_doc]
+
+        self.doc_ids.append(base.doc_ids[keep])
+        self.doc_len.append(base.doc_len[keep])
+        self.post_term.append(post_term[live])
+        self.post_doc.append(new_row[base.post_doc[live]].astype(np.int32))
+        self.post_tf.append(base.post_tf[live])
+        self.n_docs = int(keep.sum())
+
+    def add(self, ids, texts):
+        terms, docs, tfs, lens = [], [], [], []
+        for row, text in enumerate(texts, start=self.n_docs):
+            counts = Counter(tokenize(text))
+            lens.append(sum(counts.values()))
+            for term, tf in counts.items():
+                t = self.term_ids.get(term)
+                if t is None:
+                    t = self.term_ids[term] = len(self.terms)
+                    self.terms.append(term)
+                terms.append(t)
+                docs.append(row)
+                tfs.append(tf)
+
+        self.doc_ids.append(np.asarray(ids, dtype=np.int64))
+        self.doc_len.append(np.asarray(lens, dtype=np.int32))
+        self.post_term.append(np.asarray(terms, dtype=np.int32))
+        self.post_doc.append(np.asarray(docs, dtype=np.int32))
+        self.post_tf.append(np.asarray(tfs, dtype=np.int32))
+        self.n_docs += len(lens)
+
+    def finish(self) -> LexicalIndex:
+        def cat(parts, dtype):
+            return np.concatenate(parts).astype(dtype, copy=False) if parts else np.zeros(0, dtype=dtype)
+
+        post_term = cat(self.post_term, np.int32)
+        post_doc = cat(self.post_doc, np.int32)
+        post_tf = cat(self.post_tf, np.int32)
+        order = np.lexsort((post_doc, post_term))
+        offsets = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(post_term, minlength=len(self.terms)), out=offsets[1:])
+
+        return LexicalIndex.from_terms(
+            self.terms,
+            cat(self.doc_ids, np.int64),
+            cat(self.doc_len, np.int32),
+            offsets,
+            post_doc[order],
+            post_tf[order],
+        )
+
+
+def rrf(rankings, limit: int, k: int = RRF_K):
+    """
+    Reciprocal rank fusion of several best-first [(label, score)] lists:
+    score(label) = sum over lists of 1 / (k + rank). Returns the top `limit`.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, (label, _) in enumerate(ranking, start=1):
+            fused[label] = fused.get(label, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[:limit]
@@ -0,0 +1,242 @@
+import re
+import threading
+import unicodedata
+import numpy as np
+
+# In-process name search for the lookups MySQL can't index (leading-wildcard ILIKE).
+# Each name is normalised to lowercase ascii words and indexed two ways:
+#
+#   trigrams   padded per word like pg_trgm ("  ut", " ut ", ...); CSR postings
+#              gram -> rows, so fuzzy / infix matches score by shared trigrams
+#   words      sorted byte array of (word, row), so a word prefix is two searchsorted calls
+#
+# search() scores rows by trigram coverage, boosted for word-prefix, name-prefix
+# and exact matches. complete() is the typeahead path: prefix lookups only, with
+# search() as the fallback for typos. Both return the best `limit`.
+#
+# LiveNameIndex layers writes on top without a rebuild (see below).
+
+MIN_COVERAGE = 0.5  # share of the query's trigrams a fuzzy match must have
+JACCARD_WEIGHT = 0.25  # prefers shorter names at equal coverage
+WORD_PREFIX_BOOST = 0.5
+NAME_PREFIX_BOOST = 0.5
+EXACT_BOOST = 1.0
+MAX_WORD_LEN = 24  # word-prefix matching looks at this many leading bytes
+PREFIX_MATCH_SCORE = 2.0  # complete(): every query word is a word prefix
+COMPACT_AT = 256  # LiveNameIndex folds its writes into a new base past this many
+
+NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase ascii words separated by single spaces ("Université  d'Ottawa" -> "universite d ottawa")."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return NON_ALNUM_RE.sub(" ", text.lower()).strip()
+
+
+def trigrams(norm: str) -> set[str]:
+    grams = set()
+    for word in norm.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NameIndex:
+    def __init__(self, ids, labels, texts=None):
+        """ids / labels per row; texts (default labels) is what gets indexed."""
+        self.ids = list(ids)
+        self.labels = list(labels)
+        self.row_of = {id_: row for row, id_ in enumerate(self.ids)}
+        self.norm = [normalize(t) for t in (texts if texts is not None else self.labels)]
+        self.name_len = np.fromiter((len(t) for t in self.norm), dtype=np.int32, count=len(self.norm))
+
+        gram_ids, post_gram, post_row, gram_count = {}, [], [], []
+        words, word_rows = [], []
+        for row, norm in enumerate(self.norm):
+            grams = trigrams(norm)
+            for g in grams:
+                post_gram.append(gram_ids.setdefault(g, len(gram_ids)))
+                post_row.append(row)
+            gram_count.append(len(grams))
+            for w in set(norm.split()):
+                words.append(w[:MAX_WORD_LEN].encode())
+                word_rows.append(row)
+
+        post_gram = np.asarray(post_gram, dtype=np.int32)
+        order = np.argsort(post_gram, kind="stable")
+        self.gram_ids = gram_ids
+        self.post_row = np.asarray(post_row, dtype=np.int32)[order]
+        self.offsets = np.zeros(len(gram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(post_gram, minlength=len(gram_ids)), out=self.offsets[1:])
+        self.gram_count = np.asarray(gram_count, dtype=np.float32)
+
+        words = np.array(words, dtype=f"S{MAX_WORD_LEN}")
+        order = np.argsort(words, kind="stable")
+        self.words = words[order]
+        self.word_rows = np.asarray(word_rows, dtype=np.int32)[order]
+
+    @classmethod
+    def from_rows(cls, rows):
+        """From (id, label) or (id, label, text) rows."""
+        rows = list(rows)
+        return cls(
+            [r[0] for r in rows],
+            [r[1] or "" for r in rows],
+            [(r[2] if len(r) > 2 else r[1]) or "" for r in rows],
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def prefix_rows(self, prefix: str):
+        """Rows with a word starting with prefix (normalised), unique."""
+        p = prefix[:MAX_WORD_LEN].encode()
+        if not p:
+            return np.zeros(0, dtype=np.int32)
+        lo = np.searchsorted(self.words, p, side="left")
+        hi = np.searchsorted(self.words, p + b"\xff", side="left")
+        return np.unique(self.word_rows[lo:hi])
+
+    def search(self, query: str, limit: int = 10, ids=None):
+        """Best `limit` (id, label, score) for query, best first. ids restricts the rows considered."""
+        q = normalize(query)
+        n = len(self.ids)
+        if not q or limit <= 0 or not n:
+            return []
+
+        score = np.zeros(n, dtype=np.float32)
+        q_grams = trigrams(q)
+        known = [self.gram_ids[g] for g in q_grams if g in self.gram_ids]
+        if known:
+            rows = np.concatenate([self.post_row[self.offsets[g]:self.offsets[g + 1]] for g in known])
+            shared = np.bincount(rows, minlength=n).astype(np.float32)
+            coverage = shared / len(q_grams)
+            jaccard = shared / (len(q_grams) + self.gram_count - shared)
+            score = np.where(coverage >= MIN_COVERAGE, coverage + JACCARD_WEIGHT * jaccard, 0).astype(np.float32)
+        # typeahead: the word being typed only has to be a prefix
+        score[self.prefix_rows(q.rsplit(" ", 1)[-1])] += WORD_PREFIX_BOOST
+
+        if ids is not None:
+            allowed = np.zeros(n, dtype=bool)
+            allowed[[self.row_of[i] for i in ids if i in self.row_of]] = True
+            score[~allowed] = 0
+
+        cand = np.flatnonzero(score > 0)
+        if not len(cand):
+            return []
+        # name-prefix / exact boosts are string checks, so only on a shortlist
+        shortlist = min(len(cand), limit * 4)
+        top = cand[np.argpartition(-score[cand], shortlist - 1)[:shortlist]]
+        ranked = []
+        for row in top.tolist():
+            s = float(score[row])
+            norm = self.norm[row]
+            if norm == q:
+                s += EXACT_BOOST
+            if norm.startswith(q):
+                s += NAME_PREFIX_BOOST
+            ranked.append((s, row))
+        ranked.sort(key=lambda r: (-r[0], r[1]))
+        return [(self.ids[row], self.labels[row], round(s, 4)) for s, row in ranked[:limit]]
+
+    def complete(self, query: str, limit: int = 10):
+        """
+        Typeahead: rows where every query word starts a word of the name (the last
+        one usually partial), name-prefix / exact matches first, then shorter names.
+        Falls back to search() when nothing matches by prefix (typos).
+        """
+        q = normalize(query)
+        if not q or limit <= 0 or not len(self.ids):
+            return []
+        rows = None
+        for token in q.split():
+            r = self.prefix_rows(token)
+            rows = r if rows is None else np.intersect1d(rows, r, assume_unique=True)
+            if not len(rows):
+                return self.search(query, limit)
+
+        shortlist = min(len(rows), limit * 4)
+        top = rows[np.argpartition(self.name_len[rows], shortlist - 1)[:shortlist]]
+        ranked = []
+        for row in top.tolist():
+            norm = self.norm[row]
+            s = PREFIX_MATCH_SCORE + 1.0 / (1 + len(norm))
+            if norm == q:
+                s += EXACT_BOOST
+            if norm.startswith(q):
+                s += NAME_PREFIX_BOOST
+            ranked.append((s, row))
+        ranked.sort(key=lambda r: (-r[0], r[1]))
+        return [(self.ids[row], self.labels[row], round(s, 4)) for s, row in ranked[:limit]]
+
+    def stats(self):
+        return {
+            "names": len(self.ids),
+            "trigrams": len(self.gram_ids),
+            "postings": int(len(self.post_row)),
+            "words": int(len(self.words)),
+            "bytes": int(self.post_row.nbytes + self.offsets.nbytes + self.gram_count.nbytes + self.words.nbytes + self.word_rows.nbytes),
+        }
+
+
+class LiveNameIndex:
+    """
+    A NameIndex plus the writes made since it was built. Upserted rows go into a
+    small delta NameIndex and shadow their base row, removed ids are masked out,
+    and once COMPACT_AT ids have changed everything is folded into a new base.
+    Writes swap in a new (base, delta, shadowed) tuple, so readers never lock.
+    """
+
+    def __init__(self, base: NameIndex):
+        self.rows = {}  # id -> (label, text) written since base was built
+        self.state = (base, NameIndex([], []), frozenset())
+        self.lock = threading.Lock()
+
+    def upsert(self, id_, label: str, text: str | None = None):
+        with self.lock:
+            self.rows[id_] = (label or "", text if text is not None else label or "")
+            self._apply({id_})
+
+    def remove(self, id_):
+        with self.lock:
+            self.rows.pop(id_, None)
+            self._apply({id_})
+
+    def _apply(self, changed):
+        base, _, shadowed = self.state
+        shadowed = shadowed | changed
+        if len(shadowed) > COMPACT_AT:
+            keep = [
+                (id_, base.labels[row], base.norm[row])
+                for row, id_ in enumerate(base.ids) if id_ not in shadowed
+            ]
+            keep += [(id_, label, text) for id_, (label, text) in self.rows.items()]
+            self.rows = {}
+            self.state = (NameIndex.from_rows(keep), NameIndex([], []), frozenset())
+        else:
+            delta = NameIndex.from_rows((id_, label, text) for id_, (label, text) in self.rows.items())
+            self.state = (base, delta, shadowed)
+
+    def _merge(self, run, limit: int):
+        base, delta, shadowed = self.state
+        hits = [h for h in run(base, limit + len(shadowed)) if h[0] not in shadowed]
+        hits += run(delta, limit)
+        hits.sort(key=lambda h: -h[2])
+        return hits[:limit]
+
+    def search(self, query: str, limit: int = 10, ids=None):
+        return self._merge(lambda index, n: index.search(query, n, ids), limit)
+
+    def complete(self, query: str, limit: int = 10):
+        return self._merge(lambda index, n: index.complete(query, n), limit)
+
+    def __len__(self) -> int:
+        base, delta, shadowed = self.state
+        return len(base) - len(shadowed & base.row_of.keys()) + len(delta)
+
+    def stats(self):
+        base, delta, shadowed = self.state
+        return {**base.stats(), "delta": len(delta), "shadowed": len(shadowed)}
@@ -0,0 +1,71 @@
+import queue
+import threading
+from sqlalchemy.orm import Query
+
+# Keyset pagination: WHERE pk > last ORDER BY pk LIMIT n. Unlike OFFSET it costs
+# the same for every page and doesn't skip/duplicate rows when the table changes.
+
+
+def iter_keyset(query: Query, pk, page_size: int = 1000, expunge: bool = True):
+    """
+    Yield lists of ORM rows from query, page_size at a time, ordered by pk.
+    With expunge=True each page is dropped from the session's identity map once
+    the caller is done with it so memory stays bounded on big tables.
+    """
+    last = None
+    while True:
+        q = query
+        if last is not None:
+            q = q.filter(pk > last)
+        rows = q.order_by(pk).limit(page_size).all()
+        if not rows:
+            return
+        last = getattr(rows[-1], pk.key)
+        yield rows
+        if expunge:
+            for r in rows:
+                query.session.expunge(r)
+        if len(rows) < page_size:
+            return
+
+
+def prefetch(iterable, depth: int = 1):
+    """
+    Iterate iterable on a background thread, keeping up to depth items ready, so
+    producing the next item (a db page) overlaps the caller's work on this one.
+    Whatever iterable uses, its session included, must not be touched by the
+    caller until the loop ends; have it yield plain data rather than ORM rows.
+    """
+    q = queue.Queue(depth)
+    done = object()
+    stop = threading.Event()
+
+    def run():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    return
+                q.put((item, None))
+            q.put((done, None))
+        except BaseException as e:
+            q.put((done, e))
+
+    producer = threading.Thread(target=run, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = q.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # caller stopped early: unblock the producer and wait for it to let go of the session
+        stop.set()
+        while producer.is_alive():
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+            producer.join(0.1)
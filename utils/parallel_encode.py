@@ -0,0 +1,55 @@
+import os
+import time
+import numpy as np
+
+# Index-build encoder that fans encoding out over a sentence-transformers
+# multi-process pool. encode_multi_process reassembles chunks in input order,
+# so row i of the result always belongs to texts[i] no matter which worker ran it.
+# Only the plain torch backend can be shipped to pool workers; the others encode
+# in-process (onnxruntime already uses every core).
+
+
+class ParallelEncoder:
+    def __init__(self, backend, workers: int = 1, chunk_size: int = 256, batch_size: int = 32):
+        self.backend = backend
+        self.workers = max(1, workers) if backend.name == "torch" else 1
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.pool = None
+        self.texts = 0
+        self.seconds = 0.0
+
+    def __enter__(self):
+        if self.workers > 1:
+            # each worker is its own torch process; keep them from fighting over the same cores
+            os.environ.setdefault("OMP_NUM_THREADS", str(max(1, (os.cpu_count() or 1) // self.workers)))
+            self.pool = self.backend.model.start_multi_process_pool(target_devices=["cpu"] * self.workers)
+        return self
+
+    def __exit__(self, *exc):
+        if self.pool is not None:
+            self.backend.model.stop_multi_process_pool(self.pool)
+            self.pool = None
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """L2-normalized float32 embeddings, one row per text, in input order."""
+        start = time.perf_counter()
+        if self.pool is None:
+            emb = self.backend.encode(texts, batch_size=self.batch_size)
+        else:
+            emb = self.backend.model.encode_multi_process(
+                texts, self.pool, batch_size=self.batch_size, chunk_size=self.chunk_size
+            )
+            # encode_multi_process has no normalize_embeddings flag
+            emb /= np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12)
+        self.seconds += time.perf_counter() - start
+        self.texts += len(texts)
+        return np.ascontiguousarray(emb, dtype=np.float32)
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "texts": self.texts,
+            "encode_seconds": round(self.seconds, 2),
+            "texts_per_sec": round(self.texts / self.seconds, 1) if self.seconds else None,
+        }
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Query text -> embedding cache in front of model.encode.
+#
+# Tier 1 is a per-process LRU. Tier 2 (optional) is a direct-mapped table in a
+# memory-mapped file, so warm embeddings survive restarts and are shared by all
+# uvicorn workers through the page cache. Each slot holds (key hash, vector);
+# a colliding key simply overwrites the slot.
+
+_ws = re.compile(r"\s+")
+
+
+def normalize_query(q: str) -> str:
+    # all-MiniLM-L6-v2 is uncased, so lowercasing doesn't change the embedding
+    return _ws.sub(" ", q).strip().lower()
+
+
+def key_hash(model_name: str, text: str) -> int:
+    digest = hashlib.blake2b(f"{model_name}\0{text}".encode(), digest_size=8).digest()
+    # 0 marks an empty / in-progress slot
+    return int.from_bytes(digest, "little") or 1
+
+
+class DiskTier:
+    def __init__(self, path: str, dim: int, slots: int):
+        self.dim = dim
+        self.slots = slots
+        dtype = np.dtype([("key", "<u8"), ("vec", "<f4", (dim,))])
+        # O_EXCL so workers booting together don't truncate each other's table
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_RDWR)
+            os.ftruncate(fd, dtype.itemsize * slots)
+            os.close(fd)
+        except FileExistsError:
+            pass
+        table = np.memmap(path, dtype=dtype, mode="r+", shape=(slots,))
+        self.keys = table["key"]
+        self.vecs = table["vec"]
+
+    def get(self, h: int):
+        slot = h % self.slots
+        if self.keys[slot] != h:
+            return None
+        vec = np.array(self.vecs[slot])
+        # another worker may have rewritten the slot while we copied it
+        if self.keys[slot] != h:
+            return None
+        return vec
+
+    def put(self, h: int, vec: np.ndarray):
+        slot = h % self.slots
+        self.keys[slot] = 0
+        self.vecs[slot] = vec
+        self.keys[slot] = h
+
+
+class QueryEmbeddingCache:
+    def __init__(self, model_name: str, encode, dim: int, max_items: int = 10000, disk_path: str | None = None, disk_slots: int = 65536):
+        """
+        encode: callable(list[str]) -> float32 matrix of normalized embeddings.
+        disk_path: enables the shared mmap tier; the file name should include the model and dim.
+        """
+        self.model_name = model_name
+        self.encode_fn = encode
+        self.dim = dim
+        self.max_items = max_items
+        self.lru = OrderedDict()
+        self.lock = threading.Lock()
+        self.disk = DiskTier(disk_path, dim, disk_slots) if disk_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, vec):
+        with self.lock:
+            self.lru[key] = vec
+            self.lru.move_to_end(key)
+            while len(self.lru) > self.max_items:
+                self.lru.popitem(last=False)
+
+    def encode(self, queries: list[str]) -> np.ndarray:
+        """Embeddings for queries as a (len(queries), dim) float32 matrix."""
+        texts = [normalize_query(q) for q in queries]
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        missing = {}
+
+        for i, text in enumerate(texts):
+            key = key_hash(self.model_name, text)
+            with self.lock:
+                vec = self.lru.get(key)
+                if vec is not None:
+                    self.lru.move_to_end(key)
+                    self.hits += 1
+            if vec is None and self.disk is not None:
+                vec = self.disk.get(key)
+                if vec is not None:
+                    self.disk_hits += 1
+                    self._remember(key, vec)
+            if vec is None:
+                missing.setdefault(text, []).append(i)
+                continue
+            out[i] = vec
+
+        if missing:
+            uniq = list(missing)
+            vecs = self.encode_fn(uniq)
+            self.misses += len(uniq)
+            for text, vec in zip(uniq, vecs):
+                key = key_hash(self.model_name, text)
+                vec = np.asarray(vec, dtype=np.float32)
+                self._remember(key, vec)
+                if self.disk is not None:
+                    self.disk.put(key, vec)
+                for i in missing[text]:
+                    out[i] = vec
+
+        return out
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "model": self.model_name,
+            "size": len(self.lru),
+            "max_items": self.max_items,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else None,
+            "disk": self.disk is not None,
+        }
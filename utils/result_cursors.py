@@ -0,0 +1,62 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# Ranked hit lists kept between pages of a search. The first page ranks once and
+# stores the full [(label, score)] list under a random token; later pages only
+# slice it, so the cost of a page is hydrating page_size hits.
+# Entries are per worker process, bounded by count and expire after ttl seconds;
+# a cursor that lands on another worker or outlives its entry has to re-run the search.
+
+
+class ResultCursors:
+    def __init__(self, max_items: int = 1000, ttl: float = 300.0):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.entries = OrderedDict()  # token -> (created, kind, hits, extra)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, kind: str, hits: list, extra=None) -> str:
+        token = secrets.token_urlsafe(12)
+        with self.lock:
+            self.entries[token] = (time.monotonic(), kind, hits, extra)
+            while len(self.entries) > self.max_items:
+                self.entries.popitem(last=False)
+        return token
+
+    def get(self, token: str, kind: str):
+        """(hits, extra) for a live token of this kind, else None."""
+        with self.lock:
+            entry = self.entries.get(token)
+            if entry is None or entry[1] != kind or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None and entry[1] == kind:
+                    del self.entries[token]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(token)
+            self.hits += 1
+            return entry[2], entry[3]
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "max_items": self.max_items,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def encode_cursor(token: str, offset: int) -> str:
+    return f"{token}.{offset}"
+
+
+def decode_cursor(cursor: str):
+    """(token, offset), or None when the cursor is malformed."""
+    token, _, offset = cursor.rpartition(".")
+    if not token or not offset.isdigit():
+        return None
+    return token, int(offset)
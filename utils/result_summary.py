@@ -0,0 +1,174 @@
+import numpy as np
+
+from utils.columnar import read_arrays, write_arrays
+
+# Per-section contributions to the search summary block, integer coded so the
+# summary for any hit set is a few numpy group-bys instead of dict loops:
+#
+#   college[row]                                  code into colleges, -1 for none
+#   pub_codes[pub_offsets[row]:pub_offsets[row+1]] codes into publishers, one per textbook
+#
+# Rows are sorted by section_id. A section's college and textbooks are its course's,
+# so the builder collects them per course and expands to sections at the end.
+# Persisted with the other artifacts in the aligned column container (utils/columnar.py)
+# and memory-mapped on load, so picking up a new version doesn't touch the db.
+
+MAGIC = b"OCSUM1\n"
+COLLEGE_FIELDS = ("name", "abbreviation", "city", "state", "latitude", "longitude")
+
+
+class SummaryIndex:
+    def __init__(self, ids, college, pub_offsets, pub_codes, colleges, publishers):
+        self.ids = ids
+        self.college = college
+        self.pub_offsets = pub_offsets
+        self.pub_codes = pub_codes
+        self.colleges = colleges  # code -> college json (college_id + COLLEGE_FIELDS)
+        self.publishers = publishers  # code -> name
+
+    def rows(self, section_ids):
+        section_ids = np.asarray(section_ids, dtype=np.int64)
+        pos = np.searchsorted(self.ids, section_ids)
+        pos = np.minimum(pos, max(len(self.ids) - 1, 0))
+        found = (self.ids[pos] == section_ids) if len(self.ids) else np.zeros(len(section_ids), dtype=bool)
+        return pos[found]
+
+    def summarize(self, section_ids):
+        """The search summary block for a set of hit section ids (best first)."""
+        rows = self.rows(section_ids) if len(section_ids) else np.zeros(0, dtype=np.int64)
+        colleges = self.college[rows]
+
+        # textbook publishers of every hit, flattened, with the hit's college alongside
+        starts, ends = self.pub_offsets[rows], self.pub_offsets[rows + 1]
+        lens = ends - starts
+        flat = np.repeat(starts - np.cumsum(lens) + lens, lens) + np.arange(lens.sum())
+        pubs = self.pub_codes[flat]
+        pub_colleges = np.repeat(colleges, lens)
+
+        summary_colleges = {}
+        for code, count in first_seen_counts(colleges[colleges >= 0]):
+            college = self.colleges[code]
+            summary_colleges[college["college_id"]] = {
+                "name": college["name"],
+                "abbreviation": college["abbreviation"],
+                "course_count": count,
+                "city": college["city"],
+                "state": college["state"],
+                "latitude": college["latitude"],
+                "longitude": college["longitude"],
+            }
+
+        publisher_counts = {self.publishers[code]: count for code, count in first_seen_counts(pubs)}
+
+        by_college = {}
+        has_college = pub_colleges >= 0
+        pairs = pub_colleges[has_college].astype(np.int64) * max(len(self.publishers), 1) + pubs[has_college]
+        for pair, count in first_seen_counts(pairs):
+            code, pub = divmod(int(pair), max(len(self.publishers), 1))
+            college_id = self.colleges[code]["college_id"]
+            by_college.setdefault(college_id, {})[self.publishers[pub]] = count
+
+        return {
+            "college_count": len(summary_colleges),
+            "colleges": summary_colleges,
+            "publisher_counts": publisher_counts,
+            "publishers_by_college": by_college,
+        }
+
+    def write(self, path: str):
+        arrays = {"ids": self.ids, "college": self.college, "pub_offsets": self.pub_offsets, "pub_codes": self.pub_codes}
+        write_arrays(path, MAGIC, {"colleges": self.colleges, "publishers": self.publishers}, arrays)
+
+    @classmethod
+    def open(cls, path: str):
+        header, arrays = read_arrays(path, MAGIC)
+        return cls(
+            arrays["ids"], arrays["college"], arrays["pub_offsets"], arrays["pub_codes"],
+            header["colleges"], header["publishers"],
+        )
+
+    def stats(self):
+        return {
+            "sections": len(self.ids),
+            "colleges": len(self.colleges),
+            "publishers": len(self.publishers),
+            "bytes": int(self.ids.nbytes + self.college.nbytes + self.pub_offsets.nbytes + self.pub_codes.nbytes),
+        }
+
+
+def first_seen_counts(codes):
+    """(code, count) pairs ordered by first occurrence, the order the dict loops produced."""
+    if not len(codes):
+        return []
+    uniq, first, counts = np.unique(codes, return_index=True, return_counts=True)
+    order = np.argsort(first, kind="stable")
+    return [(int(uniq[i]), int(counts[i])) for i in order]
+
+
+class SummaryBuilder:
+    """add() one course at a time, then finish() with the sections' course ids."""
+
+    def __init__(self):
+        self.colleges = []
+        self.college_codes = {}
+        self.publishers = []
+        self.publisher_codes = {}
+        self.course_ids, self.course_college, self.course_lens, self.course_pubs = [], [], [], []
+
+    def add(self, course_id: int, college: dict | None, textbooks: list):
+        code = -1
+        if college:
+            code = self.college_codes.get(college["college_id"])
+            if code is None:
+                code = self.college_codes[college["college_id"]] = len(self.colleges)
+                self.colleges.append({"college_id": college["college_id"], **{f: college[f] for f in COLLEGE_FIELDS}})
+
+        pubs = []
+        for t in textbooks:
+            pub = t.get("publisher")
+            if not pub:
+                continue
+            p = self.publisher_codes.get(pub)
+            if p is None:
+                p = self.publisher_codes[pub] = len(self.publishers)
+                self.publishers.append(pub)
+            pubs.append(p)
+
+        self.course_ids.append(course_id)
+        self.course_college.append(code)
+        self.course_lens.append(len(pubs))
+        self.course_pubs.extend(pubs)
+
+    def finish(self, section_ids, section_course_ids) -> SummaryIndex:
+        """
+        section_ids sorted ascending, section_course_ids aligned with them (-1 for
+        none). Sections whose course was never added count towards nothing.
+        """
+        section_ids = np.asarray(section_ids, dtype=np.int64)
+        section_course_ids = np.asarray(section_course_ids, dtype=np.int64)
+        course_ids = np.asarray(self.course_ids, dtype=np.int64)
+        order = np.argsort(course_ids, kind="stable")
+        course_ids = course_ids[order]
+        course_college = np.asarray(self.course_college, dtype=np.int32)[order]
+        course_lens = np.asarray(self.course_lens, dtype=np.int64)
+        course_starts = (np.cumsum(course_lens) - course_lens)[order]
+        course_lens = course_lens[order]
+        course_pubs = np.asarray(self.course_pubs, dtype=np.int32)
+
+        if not len(course_ids):
+            # nothing to point at; one empty course so the lookups below stay in bounds
+            course_ids = np.full(1, -1, dtype=np.int64)
+            course_college = np.full(1, -1, dtype=np.int32)
+            course_starts = course_lens = np.zeros(1, dtype=np.int64)
+
+        # section row -> course row; sections whose course is unknown get no college / publishers
+        pos = np.minimum(np.searchsorted(course_ids, section_course_ids), len(course_ids) - 1)
+        found = (course_ids[pos] == section_course_ids) & (section_course_ids >= 0)
+        college = np.where(found, course_college[pos], -1).astype(np.int32)
+        lens = np.where(found, course_lens[pos], 0)
+        starts = np.where(found, course_starts[pos], 0)
+        offsets = np.zeros(len(section_ids) + 1, dtype=np.int64)
+        np.cumsum(lens, out=offsets[1:])
+        flat = np.repeat(starts - offsets[:-1], lens) + np.arange(offsets[-1])
+
+        return SummaryIndex(section_ids, college, offsets, course_pubs[flat], self.colleges, self.publishers)